@@ -1,5 +1,7 @@
 # app.py
+import functools
 import os
+import time
 from dotenv import load_dotenv
 from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash, current_app
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -10,6 +12,9 @@ import re # Added for the parse_coord function
 from services.ai_recommender import analyze_symptoms
 from services.symptom_mapping import match_specialty
 from services.notifications import send_email_notification
+from services import i18n, render_cache, sos_admission, shared_data, geocoder, events, analytics, hospital_dedup
+from services.doctor_routing import DoctorRouter
+from services.render_cache import cached_page
 
 # Models
 from models import db
@@ -25,13 +30,57 @@ load_dotenv()
 # App config
 app = Flask(__name__, static_folder="static", template_folder="templates")
 app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "devkey")
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///database.db"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///database.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["RENDER_CACHE_MAX_BYTES"] = int(os.getenv("RENDER_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+# Multi-process mode (gunicorn.conf.py): workers share an mmap'd hospital data generation
+app.config["SHARED_DATA_ENABLED"] = os.getenv("SHARED_DATA") == "1"
+app.config["SHARED_DATA_DIR"] = os.getenv("SHARED_DATA_DIR", os.path.join(app.instance_path, "shared"))
 
 # Init DB
 db.init_app(app)
 with app.app_context():
     db.create_all()
+    # create_all skips tables that already exist; add indexes introduced later
+    for index in Hospital.__table__.indexes | Driver.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+# Audit trail: SOS, logins, admin changes (instance/events/*.jsonl)
+events.init_app(app)
+
+# Load compiled translation catalogs once per process
+i18n.init_app(app)
+# Page/fragment cache for hot pages
+render_cache.init_app(app)
+
+# Offline gazetteer for place search / reverse geocoding
+gazetteer = geocoder.init_app(app)
+
+@functools.lru_cache(maxsize=65536)
+def _region_at(lat, lon):
+    found = gazetteer.nearest(lat, lon, max_km=250)
+    return found[0].admin if found and found[0].admin else "Unknown"
+
+def sos_region(lat, lon):
+    """State/region of an SOS for the admin analytics, from the offline gazetteer."""
+    # ~10 km cells: SOS cluster in cities, so most lookups are cache hits
+    return _region_at(round(lat, 1), round(lon, 1))
+
+# Dashboard aggregates, folded incrementally from the event log
+admin_stats = analytics.init_app(app, region_of=sos_region)
+
+# In-memory doctor assignment (per process: under gunicorn each worker
+# only matches the doctors and patients it serves)
+doctor_router = DoctorRouter(capacity=int(os.getenv("DOCTOR_CAPACITY", 5)),
+                             case_ttl=float(os.getenv("DOCTOR_CASE_TTL", 2 * 3600)),
+                             idle_timeout=float(os.getenv("DOCTOR_IDLE_TIMEOUT", 10 * 60)))
+# The doctor dashboard reloads itself this often, keeping an open tab online
+DOCTOR_DASHBOARD_REFRESH = 60
+
+# Hospital data generation, shared between worker processes (cache invalidation)
+shared = shared_data.SharedData(app.config["SHARED_DATA_DIR"])
+if app.config["SHARED_DATA_ENABLED"]:
+    render_cache.set_version_source("hospitals", lambda: shared.refresh() and shared.generation)
 
 # -------------------------------
 # UTILITY FUNCTIONS (NEW)
@@ -67,19 +116,30 @@ def parse_coord(val):
         return float(m.group())
     except:
         return None
+
+def hospitals_changed():
+    """Call after any hospital insert/update/delete is committed."""
+    render_cache.bump_version("hospitals")
+    admin_stats.hospitals_changed()
+    if app.config["SHARED_DATA_ENABLED"]:
+        shared_data.publish(app.config["SHARED_DATA_DIR"])
 # -------------------------------
 # Basic site routes
 # -------------------------------
 @app.route("/")
+@cached_page()
 def language_selection():
     return render_template("language_selection.html")
 
 @app.route("/set-language/<lang>")
 def set_language(lang):
+    if lang not in i18n.SUPPORTED_LANGUAGES:
+        lang = i18n.DEFAULT_LANGUAGE
     session["language"] = lang
     return redirect(url_for("login_choice"))
 
 @app.route("/login")
+@cached_page()
 def login_choice():
     return render_template("login_choice.html")
 
@@ -122,8 +182,10 @@ def login_patient():
         if user and check_password_hash(user.password, password):
             session["user_email"] = user.email
             session["user_role"] = "patient"
+            events.record("auth.login", role="patient", email=user.email, ip=request.remote_addr)
             flash("Logged in as patient")
             return redirect(url_for("patient_symptoms"))
+        events.record("auth.login_failed", role="patient", email=email, ip=request.remote_addr)
         flash("Invalid credentials")
         return redirect(url_for("login_patient"))
 
@@ -169,8 +231,11 @@ def login_doctor():
         if doc and check_password_hash(doc.password, password):
             session["user_email"] = doc.email
             session["user_role"] = "doctor"
+            events.record("auth.login", role="doctor", email=doc.email, ip=request.remote_addr)
+            doctor_router.doctor_online(doc.id, doc.specialization)
             flash("Logged in as doctor")
             return redirect(url_for("doctor_dashboard"))
+        events.record("auth.login_failed", role="doctor", email=email, ip=request.remote_addr)
         flash("Invalid credentials")
         return redirect(url_for("login_doctor"))
     return render_template("login_doctor.html")
@@ -180,7 +245,25 @@ def doctor_dashboard():
     if session.get("user_role") != "doctor":
         return redirect(url_for("login_doctor"))
     doc = Doctor.query.filter_by(email=session.get("user_email")).first()
-    return render_template("doctor_dashboard.html", doctor=doc)
+    if not doc:
+        flash("Doctor not found")
+        return redirect(url_for("login_doctor"))
+    # Sessions outlive the in-memory router (e.g. after a restart); each visit
+    # also counts as the doctor being present (DOCTOR_IDLE_TIMEOUT)
+    doctor_router.doctor_online(doc.id, doc.specialization)
+    return render_template("doctor_dashboard.html", doctor=doc, cases=doctor_router.cases_for(doc.id),
+                           refresh_seconds=DOCTOR_DASHBOARD_REFRESH,
+                           idle_minutes=round(doctor_router.idle_timeout / 60))
+
+@app.route("/doctor/cases/<int:case_id>/complete", methods=["POST"])
+def complete_case(case_id):
+    if session.get("user_role") != "doctor":
+        return redirect(url_for("login_doctor"))
+    doc = Doctor.query.filter_by(email=session.get("user_email")).first()
+    if doc:
+        doctor_router.complete(doc.id, case_id)
+        flash("Case completed")
+    return redirect(url_for("doctor_dashboard"))
 
 # -------------------------------
 # DRIVER (Ambulance): Register + Login
@@ -205,6 +288,7 @@ def register_driver():
         driver = Driver(name=name, email=email, phone=phone, password=hashed, is_available=False)
         db.session.add(driver)
         db.session.commit()
+        events.record("driver.registered", driver_id=driver.id)
         flash("Driver registered. Please login.")
         return redirect(url_for("login_driver"))
 
@@ -222,8 +306,10 @@ def login_driver():
         if driver and check_password_hash(driver.password, password):
             session["user_email"] = driver.email
             session["user_role"] = "driver"
+            events.record("auth.login", role="driver", email=driver.email, ip=request.remote_addr)
             flash("Logged in as driver")
             return redirect(url_for("driver_dashboard"))
+        events.record("auth.login_failed", role="driver", email=email, ip=request.remote_addr)
         flash("Invalid credentials")
         return redirect(url_for("login_driver"))
     return render_template("login_driver.html")
@@ -243,6 +329,7 @@ def driver_dashboard():
         if action == "toggle":
             driver.is_available = not driver.is_available
             db.session.commit()
+            events.record("driver.availability", driver_id=driver.id, available=driver.is_available)
             flash(f"Availability set to {driver.is_available}")
     return render_template("driver_dashboard.html", driver=driver)
 
@@ -253,10 +340,17 @@ def driver_dashboard():
 def logout():
     if session.get("user_role") == "driver" and "user_email" in session:
         driver = Driver.query.filter_by(email=session["user_email"]).first()
-        if driver:
+        if driver and driver.is_available:
             driver.is_available = False
             db.session.commit()
-
+            events.record("driver.availability", driver_id=driver.id, available=False)
+    if session.get("user_role") == "doctor" and "user_email" in session:
+        doc = Doctor.query.filter_by(email=session["user_email"]).first()
+        if doc:
+            doctor_router.doctor_offline(doc.id)
+
+    if "user_email" in session:
+        events.record("auth.logout", role=session.get("user_role"), email=session["user_email"])
     session.clear()
     flash("Logged out")
     return redirect(url_for("language_selection"))
@@ -275,9 +369,11 @@ def login_admin():
         if admin and admin.check_password(password): 
             session["user_role"] = "admin"
             session["user_email"] = admin.email
+            events.record("auth.login", role="admin", email=admin.email, ip=request.remote_addr)
             flash("Logged in as Admin", "success")
             return redirect(url_for("admin_dashboard"))
         else:
+            events.record("auth.login_failed", role="admin", email=email, ip=request.remote_addr)
             flash("Invalid credentials", "danger")
             return redirect(url_for("login_admin"))
 
@@ -288,7 +384,14 @@ def admin_dashboard():
     if session.get("user_role") != "admin":
         flash("Unauthorized", "danger")
         return redirect(url_for("login_admin"))
-    return render_template("admin_dashboard.html")
+    return render_template("admin_dashboard.html", stats=admin_stats.snapshot())
+
+ADMIN_HOSPITAL_SORTS = {
+    "name": Hospital.name,
+    "specialization": Hospital.specialization,
+    "id": Hospital.id,
+}
+ADMIN_PAGE_SIZES = (25, 50, 100, 200)
 
 @app.route("/admin/hospitals")
 def admin_hospitals():
@@ -296,8 +399,37 @@ def admin_hospitals():
         flash("Unauthorized", "danger")
         return redirect(url_for("login_admin"))
 
-    hospitals = Hospital.query.all()
-    return render_template("admin_hospitals.html", hospitals=hospitals)
+    sort = request.args.get("sort", "name")
+    if sort not in ADMIN_HOSPITAL_SORTS:
+        sort = "name"
+    direction = "desc" if request.args.get("dir") == "desc" else "asc"
+    per_page = request.args.get("per_page", 50, type=int)
+    if per_page not in ADMIN_PAGE_SIZES:
+        per_page = 50
+    q = request.args.get("q", "").strip()
+
+    query = Hospital.query
+    if q:
+        query = query.filter(Hospital.name.ilike(f"%{q}%"))
+    # Counted from the table: rows added by scripts or bulk imports never pass through the event log
+    total = query.count()
+    pages = max(1, -(-total // per_page))
+    page = min(max(1, request.args.get("page", 1, type=int)), pages)
+
+    column = ADMIN_HOSPITAL_SORTS[sort]
+    order = column.desc() if direction == "desc" else column.asc()
+    hospitals = query.order_by(order, Hospital.id).limit(per_page).offset((page - 1) * per_page).all()
+    return render_template("admin_hospitals.html", hospitals=hospitals, page=page, pages=pages,
+                           per_page=per_page, total=total, sort=sort, direction=direction, q=q)
+
+def similar_hospitals(name, lat, lon):
+    """[(hospital, name score, metres)] of registered hospitals that look like this one."""
+    min_lat, max_lat, min_lon, max_lon = hospital_dedup.bounding_box(lat, lon)
+    nearby = {h.id: h for h in Hospital.query.filter(Hospital.latitude.between(min_lat, max_lat),
+                                                     Hospital.longitude.between(min_lon, max_lon))}
+    records = [hospital_dedup.Record(h.id, h.name, h.latitude, h.longitude) for h in nearby.values()]
+    return [(nearby[r.id], score, metres)
+            for r, score, metres in hospital_dedup.find_similar(name, lat, lon, records)]
 
 @app.route("/admin/hospitals/add", methods=["GET", "POST"])
 def add_hospital():
@@ -317,15 +449,26 @@ def add_hospital():
             flash("Invalid Latitude or Longitude format.", "danger")
             return redirect(url_for("add_hospital"))
 
+        # Bulk onboarding brings the same facility in under slightly different names
+        if not request.form.get("confirm_duplicate"):
+            duplicates = similar_hospitals(name, latitude, longitude)
+            if duplicates:
+                return render_template("admin_add_hospital.html", duplicates=duplicates, form=request.form)
+
         new_h = Hospital(name=name, specialization=specialization, machines=machines,
                          latitude=latitude, longitude=longitude)
         db.session.add(new_h)
         db.session.commit()
+        events.record("admin.hospital_added", admin=session.get("user_email"),
+                      hospital_id=new_h.id, name=new_h.name, specialization=new_h.specialization)
+        hospitals_changed()
         flash("Hospital added successfully!", "success")
         return redirect(url_for("admin_hospitals"))
 
     return render_template("admin_add_hospital.html")
 
+HOSPITAL_AUDIT_FIELDS = ("name", "specialization", "machines", "latitude", "longitude")
+
 @app.route("/admin/hospitals/edit/<int:hospital_id>", methods=["GET", "POST"])
 def edit_hospital(hospital_id):
     if session.get("user_role") != "admin":
@@ -335,6 +478,7 @@ def edit_hospital(hospital_id):
     hospital = Hospital.query.get_or_404(hospital_id)
 
     if request.method == "POST":
+        before = {f: getattr(hospital, f) for f in HOSPITAL_AUDIT_FIELDS}
         hospital.name = request.form.get("name")
         hospital.specialization = request.form.get("specialization")
         hospital.machines = request.form.get("machines")
@@ -351,6 +495,11 @@ def edit_hospital(hospital_id):
         hospital.longitude = longitude
 
         db.session.commit()
+        changes = {f: [old, getattr(hospital, f)] for f, old in before.items()
+                   if getattr(hospital, f) != old}
+        events.record("admin.hospital_updated", admin=session.get("user_email"),
+                      hospital_id=hospital.id, changes=changes)
+        hospitals_changed()
         flash("Hospital updated successfully!", "success")
         return redirect(url_for("admin_hospitals"))
 
@@ -365,12 +514,42 @@ def delete_hospital(hospital_id):
     hospital = Hospital.query.get_or_404(hospital_id)
     db.session.delete(hospital)
     db.session.commit()
+    events.record("admin.hospital_deleted", admin=session.get("user_email"),
+                  hospital_id=hospital_id, name=hospital.name, specialization=hospital.specialization)
+    hospitals_changed()
     flash("Hospital deleted successfully!", "success")
     return redirect(url_for("admin_hospitals"))
 
 # -------------------------------
 # SOS API
 # -------------------------------
+def sos_email(lat, lon, driver):
+    """Subject and body of the SOS email sent to a driver."""
+    # Ensure driver coordinates are valid if you plan to use them (though not in original logic)
+    # location_url uses the original patient lat/lon
+    location_url = f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}&zoom=15"
+    subject = "🚨 SOS Alert"
+    body = f"A patient needs urgent help!\n\nLocation: {location_url}\n\nDriver Contact: {driver.phone}"
+    return subject, body
+
+def dispatch_sos(lat, lon, ticket_id=None):
+    """Notify an available driver about an SOS. Runs on an SOS worker thread."""
+    driver = Driver.query.filter_by(is_available=True).first()
+    if not driver:
+        events.record("sos.no_driver", ticket=ticket_id, lat=lat, lon=lon)
+        return {"ok": False, "msg": "No available driver"}
+
+    subject, body = sos_email(lat, lon, driver)
+    success = send_email_notification(driver.email, subject, body)
+    events.record("sos.dispatched" if success else "sos.dispatch_failed",
+                  ticket=ticket_id, lat=lat, lon=lon, driver_id=driver.id, driver=driver.email)
+    if success:
+        return {"ok": True, "to": driver.email}
+    else:
+        return {"ok": False, "msg": "Failed to send email"}
+
+sos_queue = sos_admission.init_app(app, dispatch_sos)
+
 @app.route("/api/send-sos", methods=["POST"])
 def api_send_sos():
     data = request.json or request.form
@@ -381,21 +560,52 @@ def api_send_sos():
     if lat is None or lon is None:
         return jsonify({"ok": False, "msg": "Missing or invalid location"})
 
-    driver = Driver.query.filter_by(is_available=True).first()
-    if not driver:
-        return jsonify({"ok": False, "msg": "No available driver"})
+    if not app.config.get("SOS_ADMISSION_ENABLED", True):
+        events.record("sos.raised", lat=lat, lon=lon, client=request.remote_addr, status="direct")
+        return jsonify(dispatch_sos(lat, lon))
 
-    # Ensure driver coordinates are valid if you plan to use them (though not in original logic)
-    # location_url uses the original patient lat/lon
-    location_url = f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}&zoom=15"
-    subject = "🚨 SOS Alert"
-    body = f"A patient needs urgent help!\n\nLocation: {location_url}\n\nDriver Contact: {driver.phone}"
+    status, ticket = sos_queue.submit(request.remote_addr, lat, lon)
+    events.record("sos.raised", lat=lat, lon=lon, client=request.remote_addr, status=status,
+                  ticket=ticket.id if ticket else None)
+    if status == sos_admission.RATE_LIMITED:
+        return jsonify(sos_admission.rate_limited_reply(sos_queue.pending_ticket(request.remote_addr))), 429
+    if status == sos_admission.QUEUE_FULL:
+        return jsonify({"ok": False, "msg": "SOS service is busy, please retry"}), 503
 
-    success = send_email_notification(driver.email, subject, body)
-    if success:
-        return jsonify({"ok": True, "to": driver.email})
-    else:
-        return jsonify({"ok": False, "msg": "Failed to send email"})
+    result = ticket.wait(app.config.get("SOS_WAIT_TIMEOUT", sos_admission.DEFAULTS["SOS_WAIT_TIMEOUT"]))
+    if result is None:
+        return jsonify({"ok": True, "queued": True, "ticket": ticket.id,
+                        "msg": "SOS received, dispatching a driver"}), 202
+
+    response = dict(result)
+    if status == sos_admission.DUPLICATE:
+        response["duplicate"] = True
+    return jsonify(response)
+
+# -------------------------------
+# Offline geocoding (place search + reverse lookup)
+# -------------------------------
+@app.route("/api/geocode")
+def api_geocode():
+    q = request.args.get("q", "")
+    limit = request.args.get("limit", 5, type=int)
+    results = [geocoder.place_dict(p) for p in gazetteer.search(q, limit)]
+    resp = jsonify({"ok": True, "results": results})
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 3600
+    return resp
+
+@app.route("/api/reverse-geocode")
+def api_reverse_geocode():
+    lat = parse_coord(request.args.get("lat"))
+    lon = parse_coord(request.args.get("lon"))
+    if lat is None or lon is None:
+        return jsonify({"ok": False, "msg": "Missing or invalid location"})
+    max_km = min(request.args.get("max_km", 100.0, type=float), 500.0)
+    found = gazetteer.nearest(lat, lon, max_km)
+    if found is None:
+        return jsonify({"ok": True, "place": None})
+    return jsonify({"ok": True, "place": geocoder.place_dict(*found)})
 
 # -------------------------------
 # Patient Symptom Input (UPDATED)
@@ -412,6 +622,17 @@ def patient_symptoms():
         plat = parse_coord(lat)
         plon = parse_coord(lon)
 
+        # No coordinates but a typed place name: resolve it offline. Only an
+        # exact name counts -- a prefix ("Nag") would silently pick a city.
+        place = request.form.get('place', '').strip()
+        if (plat is None or plon is None) and place:
+            found = gazetteer.resolve(place)
+            if found is None:
+                flash("Place not recognised. Pick your town from the suggestions "
+                      "or enter coordinates.", "warning")
+                return render_template('patient_symptoms.html', symptoms=symptoms, place=place)
+            plat, plon = found.lat, found.lon
+
         if plat is not None and plon is not None:
             # Save valid coords to session (NEW)
             session['patient_lat'] = plat
@@ -426,31 +647,29 @@ def patient_symptoms():
         # Map symptoms -> specialization
         specialization = match_specialty(symptoms)
 
+        # Hand the case to the least-loaded doctor of that specialty; a resubmission
+        # replaces this patient's (or this session's) previous case
+        case = doctor_router.assign(specialization, patient=session.get("user_email"), info=symptoms,
+                                    replaces=session.get("case_id"))
+        session['case_id'] = case.id
+        events.record("symptoms.matched", specialty=specialization, case_id=case.id)
+
         # Redirect to recommendation page (using query params, NOT POST)
         return redirect(url_for('recommend', specialization=specialization, symptoms=symptoms))
     return render_template('patient_symptoms.html')
 
 # -------------------------------
-# Recommendation Route (UPDATED/REPLACED)
+# Recommendation helpers (shared by /recommend, /api/recommend and asgi.py)
 # -------------------------------
-@app.route('/recommend')
-def recommend():
-    specialization = request.args.get('specialization', '').strip()
-    symptoms = request.args.get('symptoms', '').strip()
-
-    # Get patient coords: session preferred, fallback to query params
-    plat = parse_coord(session.get('patient_lat')) or parse_coord(request.args.get('lat'))
-    plon = parse_coord(session.get('patient_lon')) or parse_coord(request.args.get('lon'))
-
-    # Query hospitals (if specialization empty, return all)
-    query = Hospital.query
-    if specialization:
-        query = query.filter(
-            (Hospital.specialization.ilike(f"%{specialization}%")) |
-            (Hospital.machines.ilike(f"%{specialization}%"))
-        )
-    hospitals = query.all()
+def specialization_filter(specialization):
+    """SQL criterion: hospitals whose specialization or machines mention it."""
+    return (
+        (Hospital.specialization.ilike(f"%{specialization}%")) |
+        (Hospital.machines.ilike(f"%{specialization}%"))
+    )
 
+def rank_hospitals(hospitals, plat, plon):
+    """Hospital rows -> result dicts with distance in km, nearest first."""
     results = []
     for h in hospitals:
         hlat = parse_coord(h.latitude)
@@ -462,7 +681,7 @@ def recommend():
             try:
                 distance_km = geodesic((plat, plon), (hlat, hlon)).km
             except Exception as e:
-                current_app.logger.warning("Distance calc failed for hospital %s: %s", getattr(h,'id',None), str(e))
+                app.logger.warning("Distance calc failed for hospital %s: %s", getattr(h,'id',None), str(e))
                 distance_km = None
 
         results.append({
@@ -476,15 +695,171 @@ def recommend():
         })
 
     # Sort: None distances go to the end
-    results_sorted = sorted(results, key=lambda x: x['distance'] if x['distance'] is not None else float('inf'))
+    return sorted(results, key=lambda x: x['distance'] if x['distance'] is not None else float('inf'))
+
+# Bounding boxes tried in turn around the patient (km); each is an indexed
+# latitude range, so a lookup reads the nearby rows instead of the whole table
+SEARCH_RADII_KM = (10, 25, 50, 100, 250, 500)
+RECOMMEND_LIMIT = 50
+HOSPITAL_LIST_LIMIT = 100
+HOSPITAL_PAGE_SIZE = 50
+
+def nearby_hospitals_stmt(specialization, plat, plon, radius_km):
+    """SELECT of hospitals inside the box around the patient, optionally by specialization."""
+    min_lat, max_lat, min_lon, max_lon = hospital_dedup.bounding_box(plat, plon, radius_km * 1000)
+    stmt = db.select(Hospital).where(Hospital.latitude.between(min_lat, max_lat),
+                                     Hospital.longitude.between(min_lon, max_lon))
+    if specialization:
+        stmt = stmt.where(specialization_filter(specialization))
+    return stmt
+
+# Columns specialization_filter matches; each has an index whose distinct values are read instead of the rows
+MATCHED_COLUMNS = (Hospital.specialization, Hospital.machines)
+# Reading those distinct values is an index scan, so it is cached (see known_values)
+KNOWN_VALUES_TTL = float(os.getenv("KNOWN_VALUES_TTL", 60))
+_known_values = [None, 0.0, ()]   # cache key, expiry, values
+
+def distinct_values_stmt(column):
+    """SELECT DISTINCT of one MATCHED_COLUMNS column (a covering-index scan)."""
+    return db.select(column).distinct()
+
+def matching_values(specialization, known_values):
+    """Per MATCHED_COLUMNS column, the known values containing `specialization`."""
+    term = specialization.lower()
+    return [[v for v in values if v and term in v.lower()] for values in known_values]
+
+def matching_hospitals_stmt(specialization, known_values):
+    """
+    SELECT of every hospital matching `specialization` (all of them if empty).
+    The matching known values become an indexed IN, since a LIKE '%x%'
+    would read every row.
+    """
+    stmt = db.select(Hospital)
+    if specialization:
+        stmt = stmt.where(db.or_(*(column.in_(values) for column, values in
+                                   zip(MATCHED_COLUMNS, matching_values(specialization, known_values)))))
+    return stmt
+
+def listed_hospitals_stmt(specialization, limit, known_values=()):
+    """SELECT for when the patient's location is unknown: first `limit` matches by name."""
+    stmt = matching_hospitals_stmt(specialization, known_values)
+    if not specialization:
+        # From the first (name, id) key like the /hospitals pages: an ix_hospitals_name SEARCH
+        stmt = stmt.where(db.tuple_(Hospital.name, Hospital.id) > ("", 0))
+    return stmt.order_by(Hospital.name, Hospital.id).limit(limit)
+
+def nearest_within(ranked, radius_km, limit):
+    """The `limit` nearest ranked hospitals if the radius already holds enough, else None."""
+    inside = [h for h in ranked if h["distance"] is not None and h["distance"] <= radius_km]
+    return inside[:limit] if len(inside) >= limit else None
+
+def known_values():
+    """
+    Sub-search (yield from) returning the distinct values of each MATCHED_COLUMNS
+    column. Cached until the hospitals data version or the newest hospital id
+    (rows imported behind the app's back) changes, and for at most
+    KNOWN_VALUES_TTL seconds (rows edited behind its back).
+    """
+    newest = (yield db.select(db.func.max(Hospital.id)))[0]
+    key = (render_cache.data_version("hospitals"), newest)
+    cached_key, expires, values = _known_values
+    if key != cached_key or time.time() >= expires:
+        values = []
+        for column in MATCHED_COLUMNS:
+            values.append((yield distinct_values_stmt(column)))
+        _known_values[:] = [key, time.time() + KNOWN_VALUES_TTL, values]
+    return values
+
+def hospital_search(specialization, plat, plon, limit=RECOMMEND_LIMIT):
+    """
+    Ranked hospitals, nearest first when the location is known, widening the
+    box as needed. A generator: it yields each SELECT it needs and is sent
+    back that statement's rows, so find_hospitals (Flask) and asgi.api_recommend
+    share one search and differ only in how they execute statements. Drive it
+    with search_step(); the result is the generator's return value.
+    """
+    located = plat is not None and plon is not None
+    if located:
+        for radius_km in SEARCH_RADII_KM:
+            rows = yield nearby_hospitals_stmt(specialization, plat, plon, radius_km)
+            found = nearest_within(rank_hospitals(rows, plat, plon), radius_km, limit)
+            if found is not None:
+                return found
+    known = []
+    if specialization:
+        known = yield from known_values()
+        if not any(matching_values(specialization, known)):
+            return []
+    if located:
+        # Fewer than `limit` matches within the widest box: rank all of them
+        rows = yield matching_hospitals_stmt(specialization, known)
+        return rank_hospitals(rows, plat, plon)[:limit]
+    rows = yield listed_hospitals_stmt(specialization, limit, known)
+    return rank_hospitals(rows, plat, plon)
+
+def search_step(search, rows=None):
+    """Send `search` the rows of its last statement: (next statement, None) or (None, result)."""
+    try:
+        return search.send(rows), None
+    except StopIteration as done:
+        return None, done.value
+
+def find_hospitals(specialization, plat, plon, limit=RECOMMEND_LIMIT):
+    """hospital_search run on the Flask-SQLAlchemy session."""
+    search = hospital_search(specialization, plat, plon, limit)
+    stmt, found = search_step(search)
+    while stmt is not None:
+        stmt, found = search_step(search, db.session.scalars(stmt).all())
+    return found
+
+def case_assignment(case_id):
+    """Doctor assignment of the patient's current case, for display."""
+    case = doctor_router.get_case(case_id) if case_id else None
+    if case is None:
+        return None
+    if case.doctor_id is None:
+        return {"specialty": case.specialty, "doctor": None,
+                "position": doctor_router.queue_position(case.id)}
+    doc = db.session.get(Doctor, case.doctor_id)
+    return {"specialty": case.specialty, "doctor": doc.name if doc else None, "position": None}
+
+# -------------------------------
+# Recommendation Route (UPDATED/REPLACED)
+# -------------------------------
+@app.route('/recommend')
+def recommend():
+    specialization = request.args.get('specialization', '').strip()
+    symptoms = request.args.get('symptoms', '').strip()
+
+    # Get patient coords: session preferred, fallback to query params
+    plat = parse_coord(session.get('patient_lat')) or parse_coord(request.args.get('lat'))
+    plon = parse_coord(session.get('patient_lon')) or parse_coord(request.args.get('lon'))
+
+    # Nearest matches (if specialization empty, any hospital)
+    results_sorted = find_hospitals(specialization, plat, plon)
 
     return render_template('recommend.html',
+                           assignment=case_assignment(session.get('case_id')),
                            hospitals=results_sorted,
                            specialization=specialization,
                            symptoms=symptoms,
                            patient_lat=plat,
                            patient_lon=plon)
 
+@app.route('/api/recommend')
+def api_recommend():
+    """JSON recommendations: ?specialization= or ?symptoms=, plus ?lat=&lon=."""
+    specialization = request.args.get('specialization', '').strip()
+    symptoms = request.args.get('symptoms', '').strip()
+    if not specialization and symptoms:
+        specialization = match_specialty(symptoms)
+
+    plat = parse_coord(request.args.get('lat'))
+    plon = parse_coord(request.args.get('lon'))
+
+    return jsonify({"ok": True, "specialization": specialization,
+                    "hospitals": find_hospitals(specialization, plat, plon)})
+
 # -------------------------------
 # HOSPITAL LIST + MAP (UPDATED hospital_list and map_view)
 # -------------------------------
@@ -493,37 +868,35 @@ def hospital_list():
     # Use the robust parser on session data
     patient_lat = parse_coord(session.get("patient_lat"))
     patient_lon = parse_coord(session.get("patient_lon"))
-    hospitals = Hospital.query.all()
 
-    hospitals_with_distance = []
-    for h in hospitals:
-        # Use robust parser for hospital coords
-        hlat = parse_coord(h.latitude)
-        hlon = parse_coord(h.longitude)
-        
-        h_dict = h.__dict__ # Use dict for easy modification
-        h_dict["distance"] = None
-
-        if patient_lat is not None and patient_lon is not None and hlat is not None and hlon is not None:
-            try:
-                distance_km = geodesic((patient_lat, patient_lon), (hlat, hlon)).km
-                h_dict["distance"] = round(distance_km, 2)
-            except:
-                pass # distance remains None
-
-        hospitals_with_distance.append(h_dict)
-
-
-    # Sort: None distances go to the end
-    hospitals_sorted = sorted(hospitals_with_distance, key=lambda x: x['distance'] if x['distance'] is not None else float('inf'))
-    
-    # Note: If you want to use the SQLAlchemy objects directly instead of dicts, 
-    # you'd need to ensure 'distance' is a transient property or use a structure like 'results' in /recommend.
-    # For simplicity, returning the sorted list of dicts.
-
-    return render_template("hospital_list.html", hospitals=hospitals_sorted)
+    if patient_lat is not None and patient_lon is not None:
+        # Nearest first; the table can be far too large to rank in full
+        hospitals = find_hospitals(None, patient_lat, patient_lon, limit=HOSPITAL_LIST_LIMIT)
+        return render_template("hospital_list.html", hospitals=hospitals, nearby=True)
+
+    # No location: alphabetical pages, keyed on the (name, id) of the row
+    # before/after them, so any page is an ix_hospitals_name SEARCH instead
+    # of an OFFSET that reads every skipped row
+    key = db.tuple_(Hospital.name, Hospital.id)
+    before_id = request.args.get("before_id", type=int)
+    if before_id is not None:
+        rows = db.session.scalars(
+            db.select(Hospital).where(key < (request.args.get("before", ""), before_id))
+              .order_by(Hospital.name.desc(), Hospital.id.desc()).limit(HOSPITAL_PAGE_SIZE + 1)).all()
+        has_prev, has_next = len(rows) > HOSPITAL_PAGE_SIZE, True
+        rows = rows[:HOSPITAL_PAGE_SIZE][::-1]
+    else:
+        after_id = request.args.get("after_id", 0, type=int)
+        rows = db.session.scalars(
+            db.select(Hospital).where(key > (request.args.get("after", ""), after_id))
+              .order_by(Hospital.name, Hospital.id).limit(HOSPITAL_PAGE_SIZE + 1)).all()
+        has_prev, has_next = after_id > 0, len(rows) > HOSPITAL_PAGE_SIZE
+        rows = rows[:HOSPITAL_PAGE_SIZE]
+    return render_template("hospital_list.html", hospitals=rank_hospitals(rows, None, None),
+                           has_prev=has_prev, has_next=has_next)
 
 @app.route("/hospital/<int:hospital_id>")
+@cached_page(data=("hospitals",))
 def hospital_detail(hospital_id):
     h = Hospital.query.get_or_404(hospital_id)
     return render_template("hospital_detail.html", hospital=h)
@@ -557,6 +930,7 @@ def map_view(hospital_id):
 
 # -------------------------------
 @app.route("/emergency")
+@cached_page()
 def emergency():
     return render_template("emergency.html")
 
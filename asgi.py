@@ -0,0 +1,236 @@
+# asgi.py
+"""
+Async serving mode.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+The I/O-bound endpoints run natively on the event loop:
+
+- POST /api/send-sos  same admission control as the Flask route, but admitted
+                      SOS are dispatched by asyncio workers using async DB
+                      access and async SMTP, so waiting costs no thread
+- GET  /api/recommend same JSON as the Flask route, read through an async
+                      connection pool
+
+Every other path is handed to the unchanged Flask app through asgiref's
+WsgiToAsgi, so all existing sync routes keep working.
+
+Needs the extra packages uvicorn, asgiref, aiosqlite and sqlalchemy[asyncio]
+(aiosmtplib optional).
+"""
+import asyncio
+import itertools
+import json
+import os
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import app as app_module
+from app import app, db, hospital_search, parse_coord, search_step, sos_email, RECOMMEND_LIMIT
+from models.driver_model import Driver
+from services import events, sos_admission
+from services.notifications import send_email_notification_async
+from services.symptom_mapping import match_specialty
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+ASYNC_SOS_WORKERS = int(os.getenv("ASYNC_SOS_WORKERS", 16))
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 10))
+
+
+def async_database_url():
+    """The Flask-SQLAlchemy URL (instance-folder path resolved) with an async driver."""
+    with app.app_context():
+        url = db.engine.url
+    backend = url.get_backend_name()
+    return url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername))
+
+
+engine = None
+Session = None
+_sos_queue = None
+_seq = itertools.count()
+_startup_lock = asyncio.Lock()
+
+
+async def startup():
+    """Create the async engine and SOS workers, once: lifespan and first requests can race."""
+    global engine, Session, _sos_queue
+    async with _startup_lock:
+        if Session is not None:
+            return
+        url = async_database_url()
+        kwargs = {}
+        if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+            kwargs = {"pool_size": ASYNC_DB_POOL_SIZE, "max_overflow": ASYNC_DB_POOL_SIZE}
+        engine = create_async_engine(url, **kwargs)
+        _sos_queue = asyncio.PriorityQueue()
+        for _ in range(ASYNC_SOS_WORKERS):
+            asyncio.create_task(sos_worker())
+        Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def shutdown():
+    if engine is not None:
+        await engine.dispose()
+
+
+# -------------------------------
+# Async SOS dispatch
+# -------------------------------
+async def dispatch_sos_async(lat, lon, ticket_id=None):
+    """Async twin of app.dispatch_sos."""
+    async with Session() as s:
+        result = await s.execute(select(Driver).filter_by(is_available=True).limit(1))
+        driver = result.scalars().first()
+    if not driver:
+        events.record("sos.no_driver", ticket=ticket_id, lat=lat, lon=lon)
+        return {"ok": False, "msg": "No available driver"}
+
+    subject, body = sos_email(lat, lon, driver)
+    success = await send_email_notification_async(driver.email, subject, body)
+    events.record("sos.dispatched" if success else "sos.dispatch_failed",
+                  ticket=ticket_id, lat=lat, lon=lon, driver_id=driver.id, driver=driver.email)
+    if success:
+        return {"ok": True, "to": driver.email}
+    else:
+        return {"ok": False, "msg": "Failed to send email"}
+
+
+async def sos_worker():
+    while True:
+        _, _, ticket = await _sos_queue.get()
+        try:
+            result = await dispatch_sos_async(ticket.lat, ticket.lon, ticket.id)
+        except Exception as e:
+            print("❌ SOS dispatch failed:", e)
+            result = {"ok": False, "msg": "Dispatch failed"}
+        ticket.resolve(result)
+        sos_admission.record_resolved(ticket)
+
+
+async def api_send_sos(scope, body):
+    data = parse_body(scope, body)
+    lat = parse_coord(data.get("lat"))
+    lon = parse_coord(data.get("lon"))
+    if lat is None or lon is None:
+        return 200, {"ok": False, "msg": "Missing or invalid location"}
+
+    client = (scope.get("client") or ("unknown",))[0]
+    if not app.config.get("SOS_ADMISSION_ENABLED", True):
+        events.record("sos.raised", lat=lat, lon=lon, client=client, status="direct")
+        return 200, await dispatch_sos_async(lat, lon)
+
+    status, ticket = app_module.sos_queue.admit(client, lat, lon, _sos_queue.qsize())
+    events.record("sos.raised", lat=lat, lon=lon, client=client, status=status,
+                  ticket=ticket.id if ticket else None)
+    if status == sos_admission.RATE_LIMITED:
+        return 429, sos_admission.rate_limited_reply(app_module.sos_queue.pending_ticket(client))
+    if status == sos_admission.QUEUE_FULL:
+        return 503, {"ok": False, "msg": "SOS service is busy, please retry"}
+    if status == sos_admission.ADMITTED:
+        _sos_queue.put_nowait((ticket.priority, next(_seq), ticket))
+
+    timeout = app.config.get("SOS_WAIT_TIMEOUT", sos_admission.DEFAULTS["SOS_WAIT_TIMEOUT"])
+    result = await ticket.wait_async(timeout)
+    if result is None:
+        return 202, {"ok": True, "queued": True, "ticket": ticket.id,
+                     "msg": "SOS received, dispatching a driver"}
+
+    response = dict(result)
+    if status == sos_admission.DUPLICATE:
+        response["duplicate"] = True
+    return 200, response
+
+
+# -------------------------------
+# Async recommendations
+# -------------------------------
+async def api_recommend(scope, body):
+    args = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    specialization = args.get("specialization", "").strip()
+    symptoms = args.get("symptoms", "").strip()
+    if not specialization and symptoms:
+        specialization = await asyncio.to_thread(match_specialty, symptoms)
+
+    plat = parse_coord(args.get("lat"))
+    plon = parse_coord(args.get("lon"))
+
+    search = hospital_search(specialization, plat, plon, RECOMMEND_LIMIT)
+    async with Session() as s:
+        # Each step ranks rows (geodesic distances are CPU work); keep it off the event loop
+        stmt, ranked = await asyncio.to_thread(search_step, search)
+        while stmt is not None:
+            rows = (await s.execute(stmt)).scalars().all()
+            stmt, ranked = await asyncio.to_thread(search_step, search, rows)
+    return 200, {"ok": True, "specialization": specialization, "hospitals": ranked}
+
+
+# -------------------------------
+# ASGI plumbing
+# -------------------------------
+ASYNC_ROUTES = {
+    ("POST", "/api/send-sos"): api_send_sos,
+    ("GET", "/api/recommend"): api_recommend,
+}
+
+flask_app = WsgiToAsgi(app)
+
+
+def parse_body(scope, body):
+    headers = dict(scope.get("headers") or [])
+    ctype = headers.get(b"content-type", b"").decode()
+    if ctype.startswith("application/json"):
+        try:
+            return json.loads(body or b"{}") or {}
+        except ValueError:
+            return {}
+    return {k: v[0] for k, v in parse_qs(body.decode()).items()}
+
+
+async def read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await startup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await shutdown()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+
+    handler = None
+    if scope["type"] == "http":
+        handler = ASYNC_ROUTES.get((scope["method"], scope["path"]))
+    if handler is None:
+        return await flask_app(scope, receive, send)
+
+    if Session is None:
+        await startup()  # servers that skip the lifespan protocol
+    status, payload = await handler(scope, await read_body(receive))
+    body = json.dumps(payload).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,20 @@
+# auto_translate.py
+"""
+Compile translations/<lang>.json into binary .mo catalogs.
+
+Run this after editing a catalog (the app also rebuilds stale catalogs
+once at startup):
+
+    python auto_translate.py          # only stale catalogs
+    python auto_translate.py --force  # rebuild everything
+"""
+import sys
+
+from services.i18n import compile_catalogs
+
+if __name__ == "__main__":
+    compiled = compile_catalogs(force="--force" in sys.argv)
+    if not compiled:
+        print("All catalogs are up to date.")
+    for lang, count in compiled.items():
+        print(f"✅ Compiled {lang}.mo ({count} messages)")
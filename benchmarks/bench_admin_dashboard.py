@@ -0,0 +1,130 @@
+# benchmarks/bench_admin_dashboard.py
+"""
+Admin dashboard and hospital table latency at 100k hospitals.
+
+Run from the project root:
+
+    python -m benchmarks.bench_admin_dashboard [hospitals] [events]
+
+Seeds a throwaway SQLite database with HOSPITALS hospitals and drivers, and
+a throwaway event log with EVENTS SOS / symptom / dispatch events over the
+last day. Times:
+
+- what the old admin_hospitals did (Hospital.query.all()) and what an
+  ad-hoc dashboard would need (GROUP BYs + scanning the event log)
+- the analytics rebuild done once at start-up
+- /admin/dashboard and /admin/hospitals pages through the Flask test client
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "bench.db")
+os.environ["EVENT_LOG_DIR"] = os.path.join(_tmpdir, "events")
+
+import app as app_module  # noqa: E402
+from app import app, db  # noqa: E402
+from models.admin_model import Admin  # noqa: E402
+from models.driver_model import Driver  # noqa: E402
+from models.hospital_model import Hospital  # noqa: E402
+from services import events  # noqa: E402
+
+HOSPITALS = 100000
+EVENTS = 50000
+SPECIALTIES = ["Cardiology", "ENT", "Neurology", "Orthopedics", "Pediatrics", "General",
+               "Dermatology", "Oncology", "Gynecology", "Urology"]
+
+
+def seed(n_hospitals, n_events, rng):
+    with app.app_context():
+        db.session.execute(Hospital.__table__.insert(), [
+            {"name": f"Hospital {rng.randrange(10 ** 6):06d}", "specialization": rng.choice(SPECIALTIES),
+             "machines": "ECG,MRI", "latitude": rng.uniform(8, 34), "longitude": rng.uniform(68, 97)}
+            for _ in range(n_hospitals)])
+        db.session.execute(Driver.__table__.insert(), [
+            {"name": f"D{i}", "email": f"d{i}@x", "password": "x", "is_available": rng.random() < 0.4}
+            for i in range(500)])
+        admin = Admin(email="admin@bench")
+        admin.set_password("pw")
+        db.session.add(admin)
+        db.session.commit()
+
+    log = events.EventLog(os.environ["EVENT_LOG_DIR"], {"EVENT_LOG_FSYNC": False})
+    now = time.time()
+    batch = []
+    for i in range(n_events):
+        ts = round(now - 86400 + i * 86400 / n_events, 3)
+        kind = rng.random()
+        if kind < 0.4:
+            batch.append({"type": "sos.raised", "ts": ts, "status": "admitted",
+                          "lat": rng.uniform(8, 34), "lon": rng.uniform(68, 97)})
+        elif kind < 0.7:
+            batch.append({"type": "sos.resolved", "ts": ts, "ok": True,
+                          "elapsed_ms": rng.expovariate(1 / 800.0)})
+        else:
+            batch.append({"type": "symptoms.matched", "ts": ts, "specialty": rng.choice(SPECIALTIES)})
+        if len(batch) == 1000:
+            log._commit(batch)
+            batch = []
+    if batch:
+        log._commit(batch)
+    log.close()
+
+
+def timed(fn, repeat=20):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    n_hospitals = int(sys.argv[1]) if len(sys.argv) > 1 else HOSPITALS
+    n_events = int(sys.argv[2]) if len(sys.argv) > 2 else EVENTS
+    rng = random.Random(11)
+    seed(n_hospitals, n_events, rng)
+    print(f"{n_hospitals} hospitals, {n_events} events in the last 24 h (median ms)\n")
+
+    def old_table():
+        with app.app_context():
+            Hospital.query.all()
+
+    def adhoc_dashboard():
+        with app.app_context():
+            db.session.query(Hospital.specialization, db.func.count()).group_by(Hospital.specialization).all()
+            db.session.query(Driver.is_available, db.func.count()).group_by(Driver.is_available).all()
+        sum(1 for _ in events.query(os.environ["EVENT_LOG_DIR"], since=time.time() - 86400))
+
+    def rebuild():
+        with app.app_context():
+            app_module.admin_stats.rebuild()
+
+    print(f"{'Hospital.query.all() (old table)':<44}{timed(old_table, 3):9.1f}")
+    print(f"{'ad-hoc aggregates (GROUP BY + log scan)':<44}{timed(adhoc_dashboard, 3):9.1f}")
+    print(f"{'analytics rebuild (once per process)':<44}{timed(rebuild, 3):9.1f}\n")
+
+    client = app.test_client()
+    client.post("/login/admin", data={"email": "admin@bench", "password": "pw"})
+    pages = -(-n_hospitals // 50)
+    for label, path in [
+        ("GET /admin/dashboard", "/admin/dashboard"),
+        ("GET /admin/hospitals (page 1)", "/admin/hospitals"),
+        ("GET /admin/hospitals (middle page)", f"/admin/hospitals?page={pages // 2}"),
+        ("GET /admin/hospitals (last page)", f"/admin/hospitals?page={pages}"),
+        ("GET /admin/hospitals (by specialization)", "/admin/hospitals?sort=specialization&dir=desc"),
+        ("GET /admin/hospitals (search)", "/admin/hospitals?q=Hospital%200001"),
+    ]:
+        def get(path=path):
+            assert client.get(path).status_code == 200
+        print(f"{label:<44}{timed(get):9.1f}")
+
+
+if __name__ == "__main__":
+    main()
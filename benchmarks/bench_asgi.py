@@ -0,0 +1,194 @@
+# benchmarks/bench_asgi.py
+"""
+Concurrent-connection capacity of the WSGI deployment against the async
+serving mode (uvicorn + asgi.py). Two WSGI servers are measured: werkzeug's
+thread-per-connection server (what app.run uses) and a fixed pool of
+WSGI_THREADS threads, the shape of a gunicorn --threads deployment.
+
+Run from the project root:
+
+    python -m benchmarks.bench_asgi [concurrency ...]
+
+Each server runs in its own forked process on localhost, against the same
+throwaway SQLite database (HOSPITALS rows, one available driver). SMTP is replaced by a
+SMTP_DELAY sleep (time.sleep for WSGI, asyncio.sleep for ASGI). Each
+simulated user keeps one request in flight at a time, alternating
+/api/send-sos and /api/recommend.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import socket
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "asgi_bench.db")
+
+import uvicorn  # noqa: E402
+from werkzeug.serving import BaseWSGIServer, make_server  # noqa: E402
+
+import app as app_module  # noqa: E402
+import asgi  # noqa: E402
+from app import app, db  # noqa: E402
+from models.driver_model import Driver  # noqa: E402
+from models.hospital_model import Hospital  # noqa: E402
+from services import sos_admission  # noqa: E402
+
+WSGI_PORT = 8765
+POOLED_PORT = 8767
+ASGI_PORT = 8766
+SMTP_DELAY = 0.2
+HOSPITALS = 30
+REQUESTS_PER_USER = 6
+WSGI_THREADS = 16
+SOS_WORKERS = 64
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server with a fixed thread pool instead of a thread per connection."""
+
+    request_queue_size = 2048
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app)
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def fake_smtp(to_email, subject, body):
+    time.sleep(SMTP_DELAY)
+    return True
+
+
+async def fake_smtp_async(to_email, subject, body):
+    await asyncio.sleep(SMTP_DELAY)
+    return True
+
+
+def seed():
+    rng = random.Random(1)
+    with app.app_context():
+        db.session.add(Driver(name="Bench Driver", email="driver@example.com",
+                              password="x", phone="000", is_available=True))
+        for i in range(HOSPITALS):
+            db.session.add(Hospital(name=f"Hospital {i}", specialization=rng.choice(["Cardiology", "Neurology", "General"]),
+                                    machines="ECG,CT", latitude=18 + rng.random() * 3, longitude=73 + rng.random() * 5))
+        db.session.commit()
+
+
+def configure_admission():
+    # Benchmark traffic all comes from 127.0.0.1: lift the flood limits so
+    # the serving model, not admission control, is what gets measured.
+    app.config.update(SOS_CLIENT_RATE=1e9, SOS_CLIENT_BURST=1e9, SOS_CELL_RATE=1e9,
+                      SOS_CELL_BURST=1e9, SOS_DEDUP_PRECISION=7, SOS_WORKERS=SOS_WORKERS)
+    app_module.sos_queue = sos_admission.init_app(app, app_module.dispatch_sos)
+
+
+def serve_wsgi_threaded():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server("127.0.0.1", WSGI_PORT, app, threaded=True).serve_forever()
+
+
+def serve_wsgi_pooled():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    PooledWSGIServer("127.0.0.1", POOLED_PORT, app, WSGI_THREADS).serve_forever()
+
+
+def serve_asgi():
+    asgi.ASYNC_SOS_WORKERS = SOS_WORKERS
+    uvicorn.run(asgi.application, host="127.0.0.1", port=ASGI_PORT,
+                log_level="error", lifespan="on", backlog=2048)
+
+
+def start_servers():
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=target, daemon=True)
+             for target in (serve_wsgi_threaded, serve_wsgi_pooled, serve_asgi)]
+    for proc in procs:
+        proc.start()
+    for port in (WSGI_PORT, POOLED_PORT, ASGI_PORT):
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+    return procs
+
+
+async def http_request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    head = (f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode() + body)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return int(data.split(b" ", 2)[1])
+
+
+async def user(port, uid, latencies, errors):
+    for i in range(REQUESTS_PER_USER):
+        start = time.perf_counter()
+        try:
+            if i % 2 == 0:
+                lat, lon = 18 + (uid * 7 + i) * 1e-5, 73 + uid * 1e-5
+                status = await http_request(port, "POST", "/api/send-sos", {"lat": lat, "lon": lon})
+            else:
+                status = await http_request(port, "GET", "/api/recommend?specialization=Cardiology&lat=19&lon=73.5")
+            if status >= 400:
+                errors.append(status)
+            else:
+                latencies.append(time.perf_counter() - start)
+        except OSError as e:
+            errors.append(type(e).__name__)
+
+
+async def run_level(port, concurrency):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(user(port, uid, latencies, errors) for uid in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[int(0.99 * (len(latencies) - 1))] * 1000 if latencies else float("nan")
+    return len(latencies) / elapsed, p99, len(errors)
+
+
+def main():
+    levels = [int(x) for x in sys.argv[1:]] or [10, 100, 400]
+    app_module.send_email_notification = fake_smtp
+    asgi.send_email_notification_async = fake_smtp_async
+    seed()
+    configure_admission()
+    procs = start_servers()
+
+    modes = (("wsgi-threaded", WSGI_PORT), (f"wsgi-{WSGI_THREADS}threads", POOLED_PORT), ("asgi", ASGI_PORT))
+    print(f"{'mode':<16}{'users':>7}{'ok rps':>10}{'p99 ms':>10}{'errors':>8}")
+    for concurrency in levels:
+        for mode, port in modes:
+            rps, p99, errors = asyncio.run(run_level(port, concurrency))
+            print(f"{mode:<16}{concurrency:>7}{rps:>10.0f}{p99:>10.1f}{errors:>8}")
+
+    for proc in procs:
+        proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
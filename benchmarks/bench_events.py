@@ -0,0 +1,139 @@
+# benchmarks/bench_events.py
+"""
+Cost of the event log on the request path, and query speed.
+
+Run from the project root:
+
+    python -m benchmarks.bench_events [events]
+
+1. Per-call latency of EventLog.record() from 8 threads, against the naive
+   alternative of writing + fsyncing each event on the calling thread.
+2. How many group commits (write + fsync) the writer thread needed.
+3. A time-range + type query over a log of EVENTS events in 1 MB segments:
+   segments opened, elapsed time and peak Python memory.
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from services import events
+
+EVENTS = 300000
+THREADS = 8
+TYPES = ["sos.raised", "sos.dispatched", "auth.login", "auth.login_failed",
+         "auth.logout", "admin.hospital_updated", "email.sent"]
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))]
+
+
+class SyncLog:
+    """The naive alternative: write and fsync on the request thread."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self._f = open(os.path.join(directory, "sync.jsonl"), "ab")
+        self._lock = threading.Lock()
+
+    def record(self, event_type, **fields):
+        line = json.dumps({"type": event_type, "ts": time.time(), **fields}) + "\n"
+        with self._lock:
+            self._f.write(line.encode())
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+
+def hammer(log, per_thread):
+    samples = []
+    lock = threading.Lock()
+
+    def run():
+        mine = []
+        for i in range(per_thread):
+            t0 = time.perf_counter()
+            log.record("sos.raised", lat=20.93, lon=77.76, client="10.0.0.1", ticket=i)
+            mine.append((time.perf_counter() - t0) * 1e6)
+        with lock:
+            samples.extend(mine)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else EVENTS
+    root = tempfile.mkdtemp()
+    try:
+        per_thread = 2000
+        sync_samples, sync_wall = hammer(SyncLog(os.path.join(root, "sync")), per_thread // 10)
+
+        log = events.EventLog(os.path.join(root, "async"))
+        commits = [0]
+        real_commit = log._commit
+
+        def counting_commit(batch):
+            commits[0] += 1
+            real_commit(batch)
+        log._commit = counting_commit
+        async_samples, async_wall = hammer(log, per_thread)
+        log.close()
+
+        print(f"{THREADS} threads recording SOS events")
+        print(f"  sync write+fsync : p50 {pct(sync_samples, 50):8.1f} µs  p99 {pct(sync_samples, 99):8.1f} µs  "
+              f"{len(sync_samples) / sync_wall:9,.0f} events/s")
+        print(f"  buffered record(): p50 {pct(async_samples, 50):8.1f} µs  p99 {pct(async_samples, 99):8.1f} µs  "
+              f"{len(async_samples) / async_wall:9,.0f} events/s")
+        print(f"  {len(async_samples)} events written in {commits[0]} group commits")
+
+        # Build a big log directly (fake timestamps spread over 30 days)
+        qdir = os.path.join(root, "query")
+        big = events.EventLog(qdir, {"EVENT_LOG_SEGMENT_BYTES": 1024 * 1024, "EVENT_LOG_FSYNC": False})
+        rng = random.Random(5)
+        t_start = time.time() - 30 * 86400
+        batch = []
+        for i in range(n):
+            batch.append({"type": rng.choice(TYPES), "ts": round(t_start + i * 30 * 86400 / n, 3),
+                          "pid": 1, "client": f"10.0.{i % 256}.{i % 7}", "n": i})
+            if len(batch) == 2000:
+                big._commit(batch)
+                batch = []
+        if batch:
+            big._commit(batch)
+        big.close()
+
+        all_segments = len(events.segments(qdir))
+        since, until = time.time() - 2 * 86400, time.time() - 86400
+        t0 = time.perf_counter()
+        found = sum(1 for _ in events.query(qdir, since, until, ["sos.*"]))
+        elapsed = time.perf_counter() - t0
+        tracemalloc.start()  # separate run: tracing slows everything down
+        sum(1 for _ in events.query(qdir, since, until, ["sos.*"]))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        opened = len(events.segments(qdir, since, until))
+        print(f"\nquery sos.* for one day out of 30 over {n} events:")
+        print(f"  {found} matches, {opened}/{all_segments} segments opened, "
+              f"{elapsed * 1000:.1f} ms, peak {peak / 1024:.0f} KiB")
+
+        t0 = time.perf_counter()
+        found = sum(1 for _ in events.query(qdir, types=["auth.login_failed"]))
+        print(f"full scan for auth.login_failed: {found} matches in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
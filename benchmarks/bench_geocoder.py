@@ -0,0 +1,106 @@
+# benchmarks/bench_geocoder.py
+"""
+Latency of the offline geocoder against the 5 ms budget.
+
+Run from the project root:
+
+    python -m benchmarks.bench_geocoder [places]
+
+Builds a synthetic gazetteer (PLACES random place names spread over India,
+Pareto populations) and times type-ahead searches for 1-6 character
+prefixes plus reverse lookups, both on the Gazetteer directly and through
+/api/geocode and /api/reverse-geocode (Flask test client, throwaway SQLite
+database). Also reports load time and the index size.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "bench.db")
+
+from app import app  # noqa: E402
+from services.geocoder import Gazetteer  # noqa: E402
+
+PLACES = 200000
+QUERIES = 5000
+SYLLABLES = ["a", "am", "ra", "va", "ti", "pur", "na", "gar", "bad", "ko", "li", "ma", "han",
+             "dh", "sha", "ka", "lu", "ru", "ja", "in", "dore", "pa", "tan", "ba", "ri", "wa"]
+STATES = ["Maharashtra", "Gujarat", "Karnataka", "Kerala", "Bihar", "Punjab", "Assam", "Odisha"]
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))]
+
+
+def write_synthetic(path, n, rng):
+    names = []
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(n):
+            name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+            if rng.random() < 0.1:
+                name += " " + rng.choice(["Nagar", "Bazar", "Road", "Khurd"])
+            names.append(name)
+            f.write(f"{name}\t{rng.choice(STATES)}\t{rng.uniform(8, 34):.5f}\t"
+                    f"{rng.uniform(68, 97):.5f}\t{int(rng.paretovariate(1.2) * 1000)}\t\n")
+    return names
+
+
+def timed(fn, args_list):
+    samples = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<34}p50 {pct(samples, 50):7.3f} ms   p99 {pct(samples, 99):7.3f} ms   "
+          f"max {max(samples):7.3f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else PLACES
+    rng = random.Random(7)
+    path = os.path.join(_tmpdir, "gazetteer.tsv")
+    names = write_synthetic(path, n, rng)
+
+    t0 = time.perf_counter()
+    gaz = Gazetteer.load(path)
+    print(f"{len(gaz)} places, {len(gaz.keys)} prefix keys, {len(gaz.grid)} grid cells, "
+          f"loaded in {time.perf_counter() - t0:.2f} s\n")
+
+    prefixes = []
+    for _ in range(QUERIES):
+        name = rng.choice(names).lower()
+        prefixes.append(name[:rng.randint(1, 6)])
+    points = [(rng.uniform(8, 34), rng.uniform(68, 97)) for _ in range(QUERIES)]
+
+    for length in (1, 2, 3, 4, 6):
+        batch = [(p, 5) for p in prefixes if len(p) == length] or [(prefixes[0], 5)]
+        report(f"search, {length}-char prefix", timed(gaz.search, batch))
+    report("nearest", timed(gaz.nearest, points))
+    report("nearest, empty sea (max 100 km)", timed(gaz.nearest, [(-10.0, 60.0)] * 200))
+
+    app.extensions["geocoder"] = gaz
+    import app as app_module
+    app_module.gazetteer = gaz
+    client = app.test_client()
+
+    def http_search(q):
+        assert client.get("/api/geocode", query_string={"q": q}).status_code == 200
+
+    def http_reverse(lat, lon):
+        assert client.get("/api/reverse-geocode", query_string={"lat": lat, "lon": lon}).status_code == 200
+
+    print()
+    report("GET /api/geocode", timed(http_search, [(p,) for p in prefixes[:2000]]))
+    report("GET /api/reverse-geocode", timed(http_reverse, points[:2000]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/bench_hospital_dedup.py
+"""
+Duplicate-hospital detection on a synthetic registry.
+
+Run from the project root:
+
+    python -m benchmarks.bench_hospital_dedup [rows]
+
+Builds ROWS records: ~70% distinct facilities clustered around real cities
+from data/gazetteer.tsv (so urban blocks are dense), the rest copies of them
+with realistic name variations (typos, "Hosp.", "Pvt Ltd", reordered words)
+and up to ~50 m of coordinate noise. Reports the blocked run time, how many
+name comparisons blocking left, precision/recall of the suggested merges
+against the ground truth, and the naive all-pairs time extrapolated from a
+timed cdist sample.
+"""
+import math
+import os
+import random
+import sys
+import time
+
+from rapidfuzz import fuzz
+from rapidfuzz.process import cdist
+
+from services.geocoder import read_gazetteer
+from services.hospital_dedup import Record, normalize_name, suggest_merges
+
+ROWS = 100000
+DUPLICATE_SHARE = 0.3
+PREFIXES = ["Sai", "Shree", "City", "Apollo", "Lifeline", "Sanjeevani", "Care", "Sunrise", "Global",
+            "Metro", "Jeevan", "Arogya", "Sahyadri", "Civil", "Rural", "Mother", "Unity", "Noble",
+            "Ruby", "Om", "Shanti", "Swasthya", "Kamal", "Deep", "Asha", "Seva", "Medicover"]
+PEOPLE = ["", "", "Krishna", "Ganesh", "Lakshmi", "Mahavir", "Dr. Patil", "Dr. Deshmukh", "Joshi",
+          "Kulkarni", "Rao", "Reddy", "Sharma", "Gupta", "Iyer", "Menon", "Khan", "Singh"]
+SUFFIXES = ["Hospital", "Clinic", "Nursing Home", "Multispeciality Hospital", "Medical Centre",
+            "Children's Hospital", "Eye Hospital", "Heart Institute", "Maternity Home"]
+
+
+def vary(name, rng):
+    """A plausible re-entry of the same facility name."""
+    kind = rng.randrange(6)
+    if kind == 0 and len(name) > 6:  # typo: drop or swap a character
+        i = rng.randrange(1, len(name) - 2)
+        return name[:i] + name[i + 1:] if rng.random() < 0.5 else name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    if kind == 1:
+        return name.replace("Hospital", "Hosp.").replace("Centre", "Center")
+    if kind == 2:
+        return name + " Pvt Ltd"
+    if kind == 3:
+        words = name.split()
+        rng.shuffle(words)
+        return " ".join(words)
+    if kind == 4:
+        return name.upper()
+    return "The " + name
+
+
+def build(rows, rng):
+    cities = [(p.lat, p.lon, p.population) for p, _ in
+              read_gazetteer(os.path.join("data", "gazetteer.tsv"))]
+    weights = [c[2] for c in cities]
+    n_base = int(rows * (1 - DUPLICATE_SHARE))
+    records, truth = [], []
+    for i in range(n_base):
+        lat, lon, _ = rng.choices(cities, weights)[0]
+        name = " ".join(w for w in (rng.choice(PREFIXES), rng.choice(PEOPLE), rng.choice(SUFFIXES)) if w)
+        records.append(Record(i + 1, name, lat + rng.gauss(0, 0.05), lon + rng.gauss(0, 0.05)))
+        truth.append(i)
+    for i in range(n_base, rows):
+        base = rng.randrange(n_base)
+        b = records[base]
+        noise = rng.uniform(0, 50) / 111320.0
+        angle = rng.uniform(0, 2 * math.pi)
+        records.append(Record(i + 1, vary(b.name, rng),
+                              b.lat + noise * math.sin(angle), b.lon + noise * math.cos(angle)))
+        truth.append(base)
+    return records, truth
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    rng = random.Random(17)
+    records, truth = build(rows, rng)
+    n_dupes = sum(1 for i, t in enumerate(truth) if t != i)
+
+    stats = {}
+    start = time.perf_counter()
+    suggestions = suggest_merges(records, stats=stats)
+    blocked = time.perf_counter() - start
+
+    # Pair-level accuracy: a merge (keep, dup) is right if both share a ground-truth facility
+    index = {r.id: i for i, r in enumerate(records)}
+    correct = predicted = 0
+    for s in suggestions:
+        for d in s.duplicates:
+            predicted += 1
+            correct += truth[index[d.id]] == truth[index[s.keep.id]]
+    found_groups = {}
+    for s in suggestions:
+        for r in [s.keep] + s.duplicates:
+            found_groups[index[r.id]] = index[s.keep.id]
+    recalled = sum(1 for i, t in enumerate(truth)
+                   if t != i and i in found_groups and found_groups.get(t) == found_groups[i])
+
+    all_pairs = rows * (rows - 1) // 2
+    print(f"{rows} records, {n_dupes} planted duplicates")
+    print(f"blocked: {blocked:.1f} s, {stats['blocks']} blocks, {stats['compared']:,} name comparisons "
+          f"({stats['compared'] / all_pairs:.4%} of all pairs)")
+    print(f"suggested merges: {predicted}, precision {correct / max(1, predicted):.1%}, "
+          f"recall {recalled / n_dupes:.1%}")
+
+    sample = [normalize_name(r.name) for r in rng.sample(records, 3000)]
+    t0 = time.perf_counter()
+    cdist(sample, sample, scorer=fuzz.token_sort_ratio, score_cutoff=85, workers=-1)
+    per_pair = (time.perf_counter() - t0) / (len(sample) ** 2)
+    naive = per_pair * all_pairs
+    print(f"naive all-pairs cdist (extrapolated from a 3000 x 3000 sample, "
+          f"{os.cpu_count()} cores): "
+          f"{naive / 60:.0f} min for names alone, before any distance checks")
+
+
+if __name__ == "__main__":
+    main()
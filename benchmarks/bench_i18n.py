@@ -0,0 +1,55 @@
+# benchmarks/bench_i18n.py
+"""
+Per-language render latency for the language selection flow.
+
+Run from the project root:
+
+    python -m benchmarks.bench_i18n [iterations]
+
+Each language gets its own test client (so its own session) and hits the
+translated pages. With precompiled catalogs and fragment caching, Hindi and
+Marathi should cost the same as English.
+"""
+import statistics
+import sys
+import time
+
+from app import app
+from services.i18n import SUPPORTED_LANGUAGES
+
+PAGES = ["/", "/login", "/emergency"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def bench_language(lang, iterations):
+    client = app.test_client()
+    client.get(f"/set-language/{lang}")
+    results = {}
+    for page in PAGES:
+        client.get(page)  # warm-up: fills the fragment cache
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            resp = client.get(page)
+            samples.append((time.perf_counter() - start) * 1000)
+            assert resp.status_code == 200, (page, resp.status_code)
+        results[page] = samples
+    return results
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{'lang':<6}{'page':<14}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for lang in SUPPORTED_LANGUAGES:
+        for page, samples in bench_language(lang, iterations).items():
+            print(f"{lang:<6}{page:<14}{statistics.mean(samples):>10.3f}"
+                  f"{percentile(samples, 50):>10.3f}{percentile(samples, 99):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
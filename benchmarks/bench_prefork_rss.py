@@ -0,0 +1,84 @@
+# benchmarks/bench_prefork_rss.py
+"""
+Per-worker memory under gunicorn (gunicorn.conf.py) with a preloading master
+vs workers that each import the app after the fork (PRELOAD=0).
+
+Run from the project root:
+
+    python -m benchmarks.bench_prefork_rss [workers]
+
+Starts gunicorn in both modes against a throwaway SQLite database, waits
+until every worker has loaded the app and prints their memory. PSS is the
+number to compare: pages inherited from the master (libraries,
+SYMPTOM_INDEX, gazetteer, catalogs) are split between the workers that
+still share them.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "prefork.db")
+os.environ["SHARED_DATA_DIR"] = os.path.join(_tmpdir, "shared")
+os.environ["EVENT_LOG_DIR"] = os.path.join(_tmpdir, "events")
+
+from services.shared_data import memory_report  # noqa: E402
+
+BIND = "127.0.0.1:8790"
+READY_TIMEOUT = 60
+
+
+def fmt(mem):
+    return f"RSS {mem.get('vmrss', 0):7.1f} MB  PSS {mem.get('pss', 0):7.1f} MB"
+
+
+def children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def measure(workers, preload):
+    env = dict(os.environ, PRELOAD="1" if preload else "0", WEB_CONCURRENCY=str(workers), BIND=BIND)
+    log = open(os.path.join(_tmpdir, f"gunicorn-{int(preload)}.log"), "w+")
+    master = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app"], env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.time() + READY_TIMEOUT
+        while time.time() < deadline:
+            log.seek(0)
+            if log.read().count(" ready: ") >= workers:
+                break
+            time.sleep(0.2)
+        else:
+            raise SystemExit(f"workers not ready after {READY_TIMEOUT}s, see {log.name}")
+        time.sleep(0.2)
+
+        mode = "preloaded master" if preload else "per-worker import"
+        total_pss = 0.0
+        print(f"{mode}, {workers} workers")
+        print(f"{'worker':>8}  memory")
+        for pid in children(master.pid):
+            mem = memory_report(pid)
+            total_pss += mem.get("pss", 0)
+            print(f"{pid:>8}  {fmt(mem)}")
+        print(f"   total  PSS {total_pss:.1f} MB across {workers} workers ({mode})\n")
+    finally:
+        master.terminate()
+        master.wait()
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    # Create the schema once: workers importing the app together would race on it
+    subprocess.run([sys.executable, "-c", "import app"], check=True, stdout=subprocess.DEVNULL)
+    for preload in (False, True):
+        measure(workers, preload)
+
+
+if __name__ == "__main__":
+    main()
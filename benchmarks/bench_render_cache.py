@@ -0,0 +1,67 @@
+# benchmarks/bench_render_cache.py
+"""
+Requests/sec on the hot pages with the page cache off and on.
+
+Run from the project root:
+
+    python -m benchmarks.bench_render_cache [requests_per_route]
+
+Uses a throwaway SQLite database (one seeded hospital for hospital_detail),
+so the real database.db is never touched. The "304" column replays the last
+ETag to show the cost of a conditional GET.
+"""
+import os
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "bench.db")
+
+from app import app, db  # noqa: E402
+from models.hospital_model import Hospital  # noqa: E402
+from services import render_cache  # noqa: E402
+
+
+def seed():
+    with app.app_context():
+        h = Hospital(name="Bench Hospital", specialization="Cardiology",
+                     machines="ECG,MRI", latitude=19.07, longitude=72.87)
+        db.session.add(h)
+        db.session.commit()
+        return h.id
+
+
+def rps(client, path, n, headers=None, expect=200):
+    client.get(path)  # warm-up
+    start = time.perf_counter()
+    for _ in range(n):
+        resp = client.get(path, headers=headers)
+        assert resp.status_code == expect, (path, resp.status_code)
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    hospital_id = seed()
+    routes = ["/", "/login", "/emergency", f"/hospital/{hospital_id}"]
+    client = app.test_client()
+
+    print(f"{'route':<16}{'uncached rps':>14}{'cached rps':>12}{'304 rps':>10}{'speedup':>10}")
+    for path in routes:
+        app.config["RENDER_CACHE_ENABLED"] = False
+        before = rps(client, path, n)
+
+        app.config["RENDER_CACHE_ENABLED"] = True
+        render_cache.cache.clear()
+        after = rps(client, path, n)
+
+        etag = client.get(path).headers["ETag"]
+        revalidate = rps(client, path, n, headers={"If-None-Match": etag}, expect=304)
+        print(f"{path:<16}{before:>14.0f}{after:>12.0f}{revalidate:>10.0f}{after / before:>9.1f}x")
+
+    print("cache:", render_cache.cache.stats())
+
+
+if __name__ == "__main__":
+    main()
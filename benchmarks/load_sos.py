@@ -0,0 +1,150 @@
+# benchmarks/load_sos.py
+"""
+Load test for /api/send-sos under a flood.
+
+Run from the project root:
+
+    python -m benchmarks.load_sos
+
+A pool of SERVER_THREADS stands in for the web server's workers. Flooding
+clients (repeated taps from one spot plus a client spraying random nearby
+coordinates) arrive at FLOOD_RATE req/s while LEGIT_CLIENTS genuine patients
+each send a single SOS from their own location. SMTP is replaced by a fixed
+SMTP_DELAY sleep so the numbers don't depend on Gmail.
+
+Scenarios: legit traffic alone, flood with admission control disabled (the
+old synchronous path) and flood with admission control enabled. The number
+to watch is the p99 of legitimate SOS. The last scenario floods a single
+location cell from many addresses while IN_CELL_CLIENTS genuine patients
+inside that cell send their SOS, to show how many of them the per-cell
+limiter turns away (their 429s).
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "load.db")
+
+import app as app_module  # noqa: E402
+from app import app, db  # noqa: E402
+from models.driver_model import Driver  # noqa: E402
+from services import sos_admission  # noqa: E402
+
+SERVER_THREADS = 8
+SMTP_DELAY = 0.05
+DURATION = 1.5
+FLOOD_RATE = 400
+FLOOD_CLIENTS = 5
+LEGIT_CLIENTS = 40
+IN_CELL_CLIENTS = 10
+FLOOD_SPOT = (21.15, 79.09)
+
+
+def fake_smtp(to_email, subject, body):
+    time.sleep(SMTP_DELAY)
+    return True
+
+
+def seed():
+    with app.app_context():
+        db.session.add(Driver(name="Bench Driver", email="driver@example.com",
+                              password="x", phone="000", is_available=True))
+        db.session.commit()
+
+
+def post_sos(ip, lat, lon, submitted):
+    client = app.test_client()
+    resp = client.post("/api/send-sos", json={"lat": lat, "lon": lon},
+                       environ_base={"REMOTE_ADDR": ip})
+    return resp.status_code, time.perf_counter() - submitted
+
+
+def build_arrivals(rng):
+    arrivals = []
+    n_flood = int(FLOOD_RATE * DURATION)
+    for i in range(n_flood):
+        ip = f"10.9.0.{i % FLOOD_CLIENTS}"
+        if i % FLOOD_CLIENTS == 0:
+            # misbehaving client: random coordinates around one area
+            lat, lon = 21.14 + rng.uniform(-0.05, 0.05), 79.08 + rng.uniform(-0.05, 0.05)
+        else:
+            # panicked taps from one spot
+            lat, lon = FLOOD_SPOT
+        arrivals.append((i * DURATION / n_flood, "flood", ip, lat, lon))
+    return arrivals
+
+
+def legit_arrivals():
+    return [(i * DURATION / LEGIT_CLIENTS, "legit", f"10.1.{i // 250}.{i % 250}",
+             18.0 + i * 0.05, 73.0 + i * 0.05) for i in range(LEGIT_CLIENTS)]
+
+
+def flooded_cell():
+    """South-west corner of the admission cell FLOOD_SPOT falls in."""
+    size = sos_admission.DEFAULTS["SOS_CELL_SIZE"]
+    return (FLOOD_SPOT[0] // size) * size, (FLOOD_SPOT[1] // size) * size, size
+
+
+def cell_flood_arrivals(rng):
+    """A flood spread over many addresses, all inside the flooded cell."""
+    lat0, lon0, size = flooded_cell()
+    n_flood = int(FLOOD_RATE * DURATION)
+    return [(i * DURATION / n_flood, "flood", f"10.8.{i // 250}.{i % 250}",
+             lat0 + rng.uniform(0.1, 0.9) * size, lon0 + rng.uniform(0.1, 0.9) * size)
+            for i in range(n_flood)]
+
+
+def legit_in_cell_arrivals():
+    lat0, lon0, size = flooded_cell()
+    return [((i + 0.5) * DURATION / IN_CELL_CLIENTS, "legit-in-cell", f"10.2.0.{i}",
+             lat0 + (i + 1) / (IN_CELL_CLIENTS + 1) * size, lon0 + 0.5 * size)
+            for i in range(IN_CELL_CLIENTS)]
+
+
+def run(name, arrivals, admission):
+    app.config["SOS_ADMISSION_ENABLED"] = admission
+    app_module.sos_queue = sos_admission.init_app(app, app_module.dispatch_sos)
+    arrivals = sorted(arrivals)
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=SERVER_THREADS) as pool:
+        start = time.perf_counter()
+        for offset, kind, ip, lat, lon in arrivals:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append((kind, pool.submit(post_sos, ip, lat, lon, time.perf_counter())))
+
+    legit_ms = []
+    statuses = Counter()
+    for kind, fut in futures:
+        status, elapsed = fut.result()
+        statuses[(kind, status)] += 1
+        if kind.startswith("legit"):
+            legit_ms.append(elapsed * 1000)
+
+    legit_ms.sort()
+    p99 = legit_ms[min(len(legit_ms) - 1, int(0.99 * len(legit_ms)))]
+    print(f"{name:<28}{statistics.median(legit_ms):>10.1f}{p99:>10.1f}   "
+          + ", ".join(f"{k}:{s}={c}" for (k, s), c in sorted(statuses.items())))
+
+
+def main():
+    app_module.send_email_notification = fake_smtp
+    seed()
+    rng = random.Random(42)
+    print(f"{'scenario':<28}{'p50 ms':>10}{'p99 ms':>10}   responses")
+    run("legit only", legit_arrivals(), admission=True)
+    run("flood, no admission", legit_arrivals() + build_arrivals(rng), admission=False)
+    run("flood, admission control", legit_arrivals() + build_arrivals(rng), admission=True)
+    run("cell flood, patients inside", legit_arrivals() + legit_in_cell_arrivals()
+        + cell_flood_arrivals(rng), admission=True)
+
+
+if __name__ == "__main__":
+    main()
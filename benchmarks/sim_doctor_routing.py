@@ -0,0 +1,122 @@
+# benchmarks/sim_doctor_routing.py
+"""
+Discrete-event simulation of the doctor assignment engine.
+
+Run from the project root:
+
+    python -m benchmarks.sim_doctor_routing [patients] [doctors]
+
+Patients arrive in a rush (PATIENTS within ARRIVAL_WINDOW simulated minutes)
+with specialties drawn from the SYMPTOM_KEYWORDS distribution. Doctors are
+spread over the specialties, some of which get no doctor at all and so fall
+back to General. Consultations last an exponential SERVICE_MEAN minutes.
+
+Reports wall-clock throughput of the router (assign + complete calls per
+second), simulated queue wait times, how many cases fell back, and how
+evenly cases were spread over the doctors of each specialty.
+"""
+import heapq
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+from services.doctor_routing import DoctorRouter, FALLBACK_SPECIALTY
+from services.symptom_mapping import SYMPTOM_KEYWORDS
+
+PATIENTS = 20000
+DOCTORS = 300
+CAPACITY = 5
+ARRIVAL_WINDOW = 120.0   # minutes
+SERVICE_MEAN = 10.0      # minutes
+UNSTAFFED = {"Dentistry", "Oncology"}
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))] if values else 0.0
+
+
+def main():
+    n_patients = int(sys.argv[1]) if len(sys.argv) > 1 else PATIENTS
+    n_doctors = int(sys.argv[2]) if len(sys.argv) > 2 else DOCTORS
+    rng = random.Random(3)
+    now = [0.0]
+    router = DoctorRouter(capacity=CAPACITY, clock=lambda: now[0])
+
+    demand = Counter(SYMPTOM_KEYWORDS.values())
+    specialties = list(demand)
+    weights = [demand[s] for s in specialties]
+    staffed = [s for s in specialties if s not in UNSTAFFED]
+    staffed_weights = [demand[s] for s in staffed]
+
+    doctor_specialty = {}
+    for doctor_id in range(1, n_doctors + 1):
+        spec = rng.choices(staffed, staffed_weights)[0] if doctor_id % 5 else FALLBACK_SPECIALTY
+        doctor_specialty[doctor_id] = spec
+        router.doctor_online(doctor_id, spec)
+
+    events = []  # (time, seq, kind, payload)
+    seq = 0
+    for _ in range(n_patients):
+        seq += 1
+        heapq.heappush(events, (rng.uniform(0, ARRIVAL_WINDOW), seq, "arrive",
+                                rng.choices(specialties, weights)[0]))
+
+    waits = []
+    waits_by_spec = defaultdict(list)
+    per_doctor = Counter()
+    fallbacks = 0
+    calls = 0
+    router_time = 0.0
+    max_waiting = 0
+
+    def started(case):
+        nonlocal seq
+        waits.append(case.assigned_at - case.created)
+        waits_by_spec[case.requested].append(case.assigned_at - case.created)
+        per_doctor[case.doctor_id] += 1
+        seq += 1
+        heapq.heappush(events, (now[0] + rng.expovariate(1 / SERVICE_MEAN), seq, "done",
+                                (case.doctor_id, case.id)))
+
+    while events:
+        now[0], _, kind, payload = heapq.heappop(events)
+        t0 = time.perf_counter()
+        if kind == "arrive":
+            case = router.assign(payload)
+        else:
+            case = router.complete(*payload)
+        router_time += time.perf_counter() - t0
+        calls += 1
+
+        if case is not None and case.doctor_id is not None:
+            if kind == "arrive" and case.specialty != case.requested:
+                fallbacks += 1
+            started(case)
+        if kind == "arrive" and calls % 500 == 0:
+            max_waiting = max(max_waiting, sum(router.stats()["waiting"].values()))
+
+    print(f"{n_patients} patients, {n_doctors} doctors (capacity {CAPACITY}), "
+          f"arrivals over {ARRIVAL_WINDOW:.0f} simulated minutes")
+    print(f"router calls: {calls}  throughput: {calls / router_time:,.0f} calls/s  "
+          f"mean {router_time / calls * 1e6:.1f} µs/call")
+    print(f"queue wait (min): p50 {pct(waits, 50):.1f}  p95 {pct(waits, 95):.1f}  "
+          f"p99 {pct(waits, 99):.1f}  max {max(waits):.1f}")
+    print(f"served immediately: {sum(1 for w in waits if w == 0) / len(waits):.1%}  "
+          f"peak waiting: {max_waiting}  fell back to {FALLBACK_SPECIALTY}: {fallbacks}")
+
+    print(f"\n{'specialty':<18}{'doctors':>8}{'patients':>10}{'p95 wait':>10}  cases/doctor")
+    by_spec = defaultdict(list)
+    for doctor_id, spec in doctor_specialty.items():
+        by_spec[spec].append(per_doctor[doctor_id])
+    for spec in sorted(waits_by_spec, key=lambda s: -len(waits_by_spec[s])):
+        loads = by_spec.get(spec, [])
+        spread = f"{min(loads)}-{max(loads)} (sd {statistics.pstdev(loads):.1f})" if loads else "fallback"
+        print(f"{spec:<18}{len(loads):>8}{len(waits_by_spec[spec]):>10}"
+              f"{pct(waits_by_spec[spec], 95):>10.1f}  {spread}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# dedup_hospitals.py
+"""
+Suggest merges for duplicate hospitals.
+
+    python dedup_hospitals.py [--csv registry.csv] [--radius 250] [--threshold 85]
+                              [--out suggestions.csv]
+
+Reads the hospitals table, or a registry CSV to be onboarded (columns name,
+latitude, longitude and optionally id). Duplicates are found with spatial
+blocking + rapidfuzz cdist (see services/hospital_dedup.py). Prints each
+group with the record to keep (lowest id, i.e. the first one entered)
+and, with --out, writes one CSV row per suggested merge. Nothing is
+changed in the database.
+"""
+import argparse
+import csv
+import time
+
+from services.hospital_dedup import DEFAULT_RADIUS_M, DEFAULT_THRESHOLD, Record, suggest_merges
+
+
+def load_csv(path):
+    records = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for n, row in enumerate(csv.DictReader(f), 1):
+            try:
+                records.append(Record(int(row.get("id") or n), row["name"],
+                                      float(row["latitude"]), float(row["longitude"])))
+            except (KeyError, ValueError):
+                print(f"⚠️ Skipping row {n}: needs name, latitude, longitude")
+    return records
+
+
+def load_db():
+    from app import app
+    from models.hospital_model import Hospital
+
+    with app.app_context():
+        rows = Hospital.query.with_entities(Hospital.id, Hospital.name,
+                                            Hospital.latitude, Hospital.longitude).all()
+    return [Record(*row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find duplicate hospitals")
+    parser.add_argument("--csv", help="registry CSV instead of the database")
+    parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS_M,
+                        help="max distance in metres between duplicates")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD,
+                        help="min name similarity (0-100, token_sort_ratio)")
+    parser.add_argument("--out", help="write merge suggestions to this CSV")
+    parser.add_argument("--show", type=int, default=20, help="groups to print")
+    args = parser.parse_args()
+
+    records = load_csv(args.csv) if args.csv else load_db()
+    stats = {}
+    start = time.perf_counter()
+    suggestions = suggest_merges(records, args.radius, args.threshold, stats=stats)
+    elapsed = time.perf_counter() - start
+
+    dupes = sum(len(s.duplicates) for s in suggestions)
+    print(f"🔎 {len(records)} hospitals, {stats.get('blocks', 0)} blocks, "
+          f"{stats.get('compared', 0):,} name comparisons in {elapsed:.1f} s")
+    print(f"🏥 {len(suggestions)} groups, {dupes} suggested merges\n")
+    for s in suggestions[:args.show]:
+        print(f"keep  #{s.keep.id} {s.keep.name} ({s.keep.lat:.5f}, {s.keep.lon:.5f})")
+        for d in s.duplicates:
+            print(f"  merge #{d.id} {d.name} ({d.lat:.5f}, {d.lon:.5f})")
+
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["group", "keep_id", "keep_name", "duplicate_id", "duplicate_name",
+                             "best_score", "metres"])
+            for group, s in enumerate(suggestions, 1):
+                for d in s.duplicates:
+                    links = [p for p in s.pairs if d in p[:2]]
+                    best = max(links, key=lambda p: p[2])
+                    writer.writerow([group, s.keep.id, s.keep.name, d.id, d.name, best[2], best[3]])
+        print(f"\n📄 Wrote {dupes} suggestions to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# gunicorn.conf.py
+"""
+Multi-process deployment (gunicorn reads this file from the working directory):
+
+    gunicorn app:app
+    WEB_CONCURRENCY=8 BIND=0.0.0.0:8000 gunicorn app:app
+
+preload_app: the master imports the app once -- libraries, SYMPTOM_INDEX,
+the gazetteer, translation catalogs -- and forks the workers, which start
+from its memory instead of building their own. The pages are shared only
+until a worker writes to them, and reference counting writes to every
+Python object a worker touches, so this saves boot work and the memory of
+whatever the workers never touch; it is not zero-copy. gunicorn restarts
+workers that die.
+
+The only state the workers share explicitly is the hospital data generation
+(services/shared_data.py), so an admin edit in one worker invalidates the
+cached hospital pages of all of them. Doctor assignment
+(services/doctor_routing.py) is not shared: each worker routes only the
+doctors and patients whose requests it happens to serve. Run one worker if
+doctor assignment matters.
+
+Every worker logs its RSS/PSS once the app is loaded. PRELOAD=0 makes each
+worker import the app itself, for comparison (benchmarks/bench_prefork_rss.py).
+"""
+import os
+
+# Read by app.py at import: register the shared generation with render_cache
+os.environ["SHARED_DATA"] = "1"
+
+bind = os.getenv("BIND", "127.0.0.1:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+preload_app = os.getenv("PRELOAD", "1") == "1"
+
+
+def fmt(mem):
+    return f"RSS {mem.get('vmrss', 0):7.1f} MB  PSS {mem.get('pss', 0):7.1f} MB"
+
+
+def when_ready(server):
+    from services.shared_data import memory_report
+    server.log.info("master %s: %s", os.getpid(), fmt(memory_report()))
+    if server.cfg.workers > 1:
+        server.log.warning("doctor assignment is per worker: doctors and patients on "
+                           "different workers are never matched")
+    if server.cfg.preload_app:
+        from app import app
+        from services import shared_data
+        gen = shared_data.publish(app.config["SHARED_DATA_DIR"])
+        server.log.info("hospital data generation %s", gen)
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import app, db
+        with app.app_context():
+            # Never share pooled DB connections across fork()
+            db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    from services.shared_data import memory_report
+    worker.log.info("worker %s ready: %s", worker.pid, fmt(memory_report()))
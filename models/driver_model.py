@@ -7,4 +7,4 @@ class Driver(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
     phone = db.Column(db.String(20), nullable=True)
-    is_available = db.Column(db.Boolean, default=False)
+    is_available = db.Column(db.Boolean, default=False, index=True)   # SOS dispatch lookup
@@ -4,8 +4,8 @@ from . import db
 class Hospital(db.Model):
     __tablename__ = 'hospitals'
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
-    specialization = db.Column(db.String(100), nullable=False)   # e.g. "Cardiology"
-    machines = db.Column(db.String(250), nullable=True)          # comma-separated e.g. "MRI,CT,ECG"
-    latitude = db.Column(db.Float, nullable=False)
+    name = db.Column(db.String(120), nullable=False, index=True)
+    specialization = db.Column(db.String(100), nullable=False, index=True)   # e.g. "Cardiology"
+    machines = db.Column(db.String(250), nullable=True, index=True)   # comma-separated e.g. "MRI,CT,ECG"
+    latitude = db.Column(db.Float, nullable=False, index=True)   # bounding-box lookups
     longitude = db.Column(db.Float, nullable=False)
@@ -0,0 +1,74 @@
+# query_events.py
+"""
+Query the append-only event log (services/events.py).
+
+    python query_events.py [--since 2h] [--until 2025-01-31T18:00] [--type sos.*]
+                           [--type auth.login_failed] [--limit 50] [--count]
+
+--since/--until take an ISO date/time or a relative age (30m, 2h, 7d).
+--type is an exact event type or a prefix ending in '*'; repeatable.
+Prints one JSON event per line, oldest first, or with --count the number of
+events per type. Segments outside the time range are never opened and the
+rest are streamed, so memory use stays flat however big the log gets.
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+
+from services.events import query
+
+RELATIVE = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_time(value):
+    """Unix seconds from '2h' style ages or ISO date/times (local time)."""
+    if value is None:
+        return None
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", value.strip())
+    if m:
+        return time.time() - float(m.group(1)) * RELATIVE[m.group(2)]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a time: {value!r} (use e.g. 2h or 2025-01-31T18:00)")
+
+
+def main():
+    default_dir = os.getenv("EVENT_LOG_DIR",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "events"))
+    parser = argparse.ArgumentParser(description="Scan the Smart Healthcare event log")
+    parser.add_argument("--dir", default=default_dir, help="event log directory")
+    parser.add_argument("--since", type=parse_time)
+    parser.add_argument("--until", type=parse_time)
+    parser.add_argument("--type", dest="types", action="append",
+                        help="event type, or prefix ending in '*' (repeatable)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--count", action="store_true", help="only count events per type")
+    args = parser.parse_args()
+
+    found = query(args.dir, args.since, args.until, args.types)
+    if args.limit is not None:
+        found = itertools.islice(found, args.limit)
+
+    if args.count:
+        counts = Counter(e.get("type") for e in found)
+        for event_type, n in counts.most_common():
+            print(f"{n:>8}  {event_type}")
+        print(f"{sum(counts.values()):>8}  total")
+        return
+
+    try:
+        for event in found:
+            sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+    except BrokenPipeError:  # | head
+        pass
+
+
+if __name__ == "__main__":
+    main()
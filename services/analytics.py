@@ -0,0 +1,217 @@
+# services/analytics.py
+"""
+Incremental admin analytics built from the event log (services/events.py).
+
+Nothing here runs ad-hoc queries per page view. Analytics.catch_up() reads
+only the bytes appended to the event segments since the previous call (by
+any process, so prefork workers all converge) and folds each event into:
+
+- RollingCounter: WINDOW_HOURS hourly buckets in a fixed-size ring
+  (SOS per hour, per region, per specialty, dispatch time sums)
+- plain counters for drivers available / registered, seeded by one GROUP BY
+  at start-up and then moved by driver.* events
+
+Hospitals per specialization come from the indexed GROUP BY itself,
+re-run at most every HOSPITAL_COUNTS_TTL seconds (sooner after an admin
+edit), because bulk imports and scripts never reach the event log. Drivers
+written behind the app's back show up after the next rebuild(), i.e. on
+restart.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import func
+
+from models import db
+from models.driver_model import Driver
+from models.hospital_model import Hospital
+from services import events
+
+WINDOW_HOURS = 24
+BUCKET_SECONDS = 3600
+COUNTED_SOS = ("admitted", "direct")   # sos.raised statuses that are a new emergency
+DUPLICATE_SOS = ("duplicate",)          # joined an SOS already in flight
+HOSPITAL_COUNTS_TTL = 30.0              # seconds
+
+
+class RollingCounter:
+    """Sums over the last `buckets` time buckets, in O(buckets) memory."""
+
+    __slots__ = ("bucket_seconds", "values", "slots")
+
+    def __init__(self, buckets=WINDOW_HOURS, bucket_seconds=BUCKET_SECONDS):
+        self.bucket_seconds = bucket_seconds
+        self.values = [0.0] * buckets
+        self.slots = [-1] * buckets   # absolute bucket number each ring slot holds
+
+    def add(self, ts, value=1):
+        n = int(ts // self.bucket_seconds)
+        i = n % len(self.values)
+        if self.slots[i] != n:
+            if self.slots[i] > n:
+                return  # older than the window
+            self.slots[i] = n
+            self.values[i] = 0.0
+        self.values[i] += value
+
+    def series(self, now=None):
+        """[(bucket start ts, value)] for the whole window, oldest first."""
+        current = int((now or time.time()) // self.bucket_seconds)
+        size = len(self.values)
+        out = []
+        for n in range(current - size + 1, current + 1):
+            i = n % size
+            out.append((n * self.bucket_seconds, self.values[i] if self.slots[i] == n else 0.0))
+        return out
+
+    def total(self, now=None):
+        current = int((now or time.time()) // self.bucket_seconds)
+        oldest = current - len(self.values) + 1
+        return sum(v for v, n in zip(self.values, self.slots) if oldest <= n <= current)
+
+
+class Analytics:
+    def __init__(self, directory, region_of=None, window_hours=WINDOW_HOURS,
+                 hospital_counts_ttl=HOSPITAL_COUNTS_TTL):
+        self.directory = directory
+        self.region_of = region_of or (lambda lat, lon: "Unknown")
+        self.window_hours = window_hours
+        self.hospital_counts_ttl = hospital_counts_ttl
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.baseline = time.time()
+        self._offsets = {}   # segment path -> bytes consumed
+        self.sos = RollingCounter(self.window_hours)
+        self.sos_duplicates = RollingCounter(self.window_hours)
+        self.sos_rejected = RollingCounter(self.window_hours)   # rate limited or queue full
+        self.sos_by_region = {}
+        self.dispatch_ms = RollingCounter(self.window_hours)
+        self.dispatches = RollingCounter(self.window_hours)
+        self.specialty_demand = {}
+        self.hospitals_by_spec = Counter()
+        self._hospitals_counted = 0.0
+        self.drivers_total = 0
+        self.drivers_available = 0
+
+    def rebuild(self):
+        """Seed the totals from the database and replay the window. Needs an app context."""
+        with self._lock:
+            self._reset()
+            self._count_hospitals()
+            for available, n in db.session.query(Driver.is_available, func.count(Driver.id)) \
+                                          .group_by(Driver.is_available).all():
+                self.drivers_total += n
+                if available:
+                    self.drivers_available += n
+            self._catch_up()
+
+    def _count_hospitals(self):
+        rows = db.session.query(Hospital.specialization, func.count(Hospital.id)) \
+                         .group_by(Hospital.specialization).all()
+        self.hospitals_by_spec = Counter({spec: n for spec, n in rows})
+        self._hospitals_counted = time.time()
+
+    def hospitals_changed(self):
+        """Recount hospitals on the next snapshot (call after an admin edit)."""
+        self._hospitals_counted = 0.0
+
+    # -------------------------------
+    # Event folding
+    # -------------------------------
+    def catch_up(self):
+        """Fold in events appended since the last call. Cheap when nothing changed."""
+        with self._lock:
+            self._catch_up()
+
+    def _catch_up(self):
+        window_start = time.time() - self.window_hours * BUCKET_SECONDS
+        for path in events.segments(self.directory, since=min(window_start, self.baseline)):
+            offset = self._offsets.get(path, 0)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if size <= offset:
+                continue
+            with open(path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read(size - offset)
+            end = chunk.rfind(b"\n") + 1   # leave a half-written line for next time
+            self._offsets[path] = offset + end
+            for line in chunk[:end].splitlines():
+                try:
+                    self.apply(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def apply(self, event):
+        etype, ts = event.get("type"), event.get("ts", 0)
+        if etype == "sos.raised":
+            if event.get("status") in COUNTED_SOS:
+                self.sos.add(ts)
+                region = self.region_of(event["lat"], event["lon"])
+                self.sos_by_region.setdefault(region, RollingCounter(self.window_hours)).add(ts)
+            elif event.get("status") in DUPLICATE_SOS:
+                self.sos_duplicates.add(ts)
+            else:
+                self.sos_rejected.add(ts)
+        elif etype == "sos.resolved" and event.get("ok"):
+            self.dispatch_ms.add(ts, event["elapsed_ms"])
+            self.dispatches.add(ts)
+        elif etype == "symptoms.matched":
+            self.specialty_demand.setdefault(
+                event["specialty"], RollingCounter(self.window_hours)).add(ts)
+        elif ts <= self.baseline:
+            return  # already part of the GROUP BY seed
+        elif etype == "driver.registered":
+            self.drivers_total += 1
+        elif etype == "driver.availability":
+            self.drivers_available += 1 if event["available"] else -1
+
+    # -------------------------------
+    # Reading
+    # -------------------------------
+    def snapshot(self):
+        """Everything the admin dashboard shows, as plain data. Needs an app context."""
+        with self._lock:
+            self._catch_up()
+            now = time.time()
+            if now - self._hospitals_counted >= self.hospital_counts_ttl:
+                self._count_hospitals()
+            dispatches = self.dispatches.total(now)
+
+            def top(counters, limit=10):
+                totals = [(k, int(c.total(now))) for k, c in counters.items()]
+                return sorted([t for t in totals if t[1]], key=lambda t: -t[1])[:limit]
+
+            return {
+                "window_hours": self.window_hours,
+                "sos_total": int(self.sos.total(now)),
+                "sos_duplicates": int(self.sos_duplicates.total(now)),
+                "sos_rejected": int(self.sos_rejected.total(now)),
+                "sos_per_hour": [(time.strftime("%H:00", time.localtime(t)), int(v))
+                                 for t, v in self.sos.series(now)],
+                "sos_by_region": top(self.sos_by_region),
+                "mean_dispatch_ms": self.dispatch_ms.total(now) / dispatches if dispatches else None,
+                "specialty_demand": top(self.specialty_demand),
+                "hospitals_by_spec": [(s, n) for s, n in self.hospitals_by_spec.most_common() if n > 0],
+                "hospitals_total": sum(self.hospitals_by_spec.values()),
+                "drivers_total": self.drivers_total,
+                "drivers_available": self.drivers_available,
+                "driver_availability": (self.drivers_available / self.drivers_total
+                                        if self.drivers_total else None),
+            }
+
+
+def init_app(app, region_of=None):
+    """Build the Analytics for `app` from its event log directory (call after events.init_app)."""
+    analytics = Analytics(app.config["EVENT_LOG_DIR"], region_of)
+    with app.app_context():
+        analytics.rebuild()
+    app.extensions["analytics"] = analytics
+    return analytics
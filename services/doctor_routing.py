@@ -0,0 +1,339 @@
+# services/doctor_routing.py
+"""
+Assign patients to online doctors by specialty and current caseload.
+
+Each specialty keeps a min-heap of its online doctors keyed on
+(caseload, last assignment sequence), so the least-loaded doctor is found in
+O(log n) and ties go to whoever was assigned least recently (round-robin
+fairness). Heap entries are invalidated lazily: a doctor whose load changed
+gets a fresh entry and stale ones are skipped when popped.
+
+When every matching doctor is at capacity the case waits in that
+specialty's FIFO queue and is handed to the next doctor who completes a case.
+Specialties with no online doctor at all fall back to "General".
+
+A patient holds at most one open case: a new submission replaces the old
+one. Cases not completed within case_ttl seconds expire, freeing the
+doctor's slot. Doctors not seen (doctor_online, complete) for idle_timeout
+seconds -- e.g. they closed the browser instead of logging out -- are taken
+offline before the next case is routed.
+
+State lives in this process's memory. With several worker processes
+(gunicorn.conf.py) each worker routes only the doctors and patients it
+happens to serve.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+from rapidfuzz import fuzz, process
+
+from services.symptom_mapping import SYMPTOM_KEYWORDS
+
+FALLBACK_SPECIALTY = "General"
+DEFAULT_CAPACITY = 5
+DEFAULT_CASE_TTL = 2 * 3600   # seconds an open case holds its slot
+DEFAULT_IDLE_TIMEOUT = 10 * 60   # seconds without a request before a doctor goes offline
+
+SPECIALTIES = sorted(set(SYMPTOM_KEYWORDS.values()))
+
+# Practitioner titles doctors register with -> specialty names
+TITLE_ALIASES = {
+    "dentist": "Dentistry",
+    "pediatrician": "Pediatrics",
+    "paediatrician": "Pediatrics",
+    "psychiatrist": "Psychiatry",
+    "orthopedic": "Orthopedics",
+    "orthopaedic": "Orthopedics",
+    "physician": FALLBACK_SPECIALTY,
+    "general physician": FALLBACK_SPECIALTY,
+    "gp": FALLBACK_SPECIALTY,
+}
+
+
+def normalize_specialty(text):
+    """Map free-text specializations ("cardiologist", "ENT ") onto canonical names."""
+    text = (text or "").strip()
+    if not text:
+        return FALLBACK_SPECIALTY
+    key = text.lower()
+    if key in TITLE_ALIASES:
+        return TITLE_ALIASES[key]
+    key = key.replace("ologist", "ology")   # cardiologist -> cardiology
+    for name in SPECIALTIES:
+        if name.lower() == key:
+            return name
+    match = process.extractOne(key, SPECIALTIES, scorer=fuzz.WRatio, score_cutoff=80,
+                                processor=str.lower)
+    return match[0] if match else text.title()
+
+
+class Case:
+    __slots__ = ("id", "specialty", "requested", "patient", "info",
+                 "created", "assigned_at", "doctor_id")
+
+    def __init__(self, case_id, specialty, patient, info, created):
+        self.id = case_id
+        self.specialty = specialty      # queue the case is served from
+        self.requested = specialty      # what match_specialty asked for
+        self.patient = patient
+        self.info = info
+        self.created = created
+        self.assigned_at = None
+        self.doctor_id = None
+
+
+class _DoctorState:
+    __slots__ = ("id", "specialty", "capacity", "cases", "last_seq", "version", "online", "last_seen")
+
+    def __init__(self, doctor_id, specialty, capacity):
+        self.id = doctor_id
+        self.specialty = specialty
+        self.capacity = capacity
+        self.cases = {}
+        self.last_seq = 0
+        self.version = 0
+        self.online = True
+        self.last_seen = 0.0
+
+
+class DoctorRouter:
+    def __init__(self, capacity=DEFAULT_CAPACITY, clock=time.monotonic, case_ttl=DEFAULT_CASE_TTL,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.capacity = capacity
+        self.clock = clock
+        self.case_ttl = case_ttl
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._doctors = {}          # doctor id -> _DoctorState
+        self._heaps = {}            # specialty -> [(load, last_seq, version, doctor id)]
+        self._online = {}           # specialty -> number of online doctors
+        self._waiting = {}          # specialty -> {case id: Case}, insertion ordered
+        self._cases = {}            # case id -> Case, oldest first
+        self._by_patient = {}       # patient -> their open case id
+        self._seen = {}             # online doctor id -> last seen, least recently seen first
+        self._seq = itertools.count(1)
+        self._case_ids = itertools.count(1)
+
+    # -------------------------------
+    # Doctors
+    # -------------------------------
+    def doctor_online(self, doctor_id, specialization, capacity=None):
+        """
+        Register a doctor as available, or note that an online doctor is
+        still there; returns cases handed to them from the queue.
+        """
+        with self._lock:
+            doc = self._doctors.get(doctor_id)
+            if doc is not None and doc.online:
+                self._touch(doc)
+                return []
+            if doc is None:
+                doc = self._doctors[doctor_id] = _DoctorState(
+                    doctor_id, normalize_specialty(specialization), capacity or self.capacity)
+            doc.online = True
+            self._touch(doc)
+            self._online[doc.specialty] = self._online.get(doc.specialty, 0) + 1
+            self._push(doc)
+            return self._drain_waiting(doc)
+
+    def doctor_offline(self, doctor_id):
+        """
+        Take a doctor out of rotation. Their open cases are routed again
+        (to another doctor or the queue); returns those that found a doctor.
+        """
+        with self._lock:
+            doc = self._doctors.get(doctor_id)
+            if doc is None or not doc.online:
+                return []
+            return self._offline(doc)
+
+    # -------------------------------
+    # Cases
+    # -------------------------------
+    def assign(self, specialty, patient=None, info=None, replaces=None):
+        """
+        Route a new case. Returns the Case; case.doctor_id is None while it
+        waits in the queue. The patient's open case, and the case id
+        `replaces` (e.g. the one in an anonymous session), are withdrawn first.
+        """
+        with self._lock:
+            self._expire()
+            self._drop_idle()
+            for old_id in (self._by_patient.get(patient) if patient else None, replaces):
+                old = self._cases.get(old_id)
+                if old is not None:
+                    self._withdraw(old)
+            specialty = normalize_specialty(specialty)
+            case = Case(next(self._case_ids), specialty, patient, info, self.clock())
+            self._cases[case.id] = case
+            if patient:
+                self._by_patient[patient] = case.id
+            self._route(case, specialty)
+            return case
+
+    def complete(self, doctor_id, case_id):
+        """
+        Close a case. Returns the waiting case the doctor picked up next,
+        or None.
+        """
+        with self._lock:
+            doc = self._doctors.get(doctor_id)
+            case = doc.cases.pop(case_id, None) if doc is not None else None
+            if case is None:
+                return None
+            self._forget(case)
+            if not doc.online:
+                return None
+            self._touch(doc)
+            self._push(doc)
+            handed = self._drain_waiting(doc)
+            return handed[0] if handed else None
+
+    def get_case(self, case_id):
+        return self._cases.get(case_id)
+
+    def cases_for(self, doctor_id):
+        with self._lock:
+            self._expire()
+            doc = self._doctors.get(doctor_id)
+            return sorted(doc.cases.values(), key=lambda c: c.assigned_at) if doc else []
+
+    def queue_position(self, case_id):
+        """1-based position of a waiting case in its queue, None if not waiting."""
+        with self._lock:
+            case = self._cases.get(case_id)
+            if case is None or case.doctor_id is not None:
+                return None
+            for pos, cid in enumerate(self._waiting.get(case.specialty, {}), 1):
+                if cid == case_id:
+                    return pos
+            return None
+
+    def stats(self):
+        with self._lock:
+            self._drop_idle()
+            return {
+                "online": {s: n for s, n in self._online.items() if n},
+                "waiting": {s: len(q) for s, q in self._waiting.items() if q},
+                "open_cases": sum(len(d.cases) for d in self._doctors.values()),
+            }
+
+    # -------------------------------
+    # Internals (lock held)
+    # -------------------------------
+    def _push(self, doc):
+        doc.version += 1
+        heap = self._heaps.setdefault(doc.specialty, [])
+        heapq.heappush(heap, (len(doc.cases), doc.last_seq, doc.version, doc.id))
+        if len(heap) > 4 * self._online.get(doc.specialty, 0) + 64:
+            # Too many stale entries buried below the top: rebuild
+            heap[:] = [e for e in heap
+                       if self._doctors[e[3]].online and e[2] == self._doctors[e[3]].version]
+            heapq.heapify(heap)
+
+    def _pop_least_loaded(self, specialty):
+        """Least-loaded online doctor of `specialty` with spare capacity, or None."""
+        heap = self._heaps.get(specialty)
+        while heap:
+            load, _, version, doctor_id = heap[0]
+            doc = self._doctors[doctor_id]
+            if not doc.online or version != doc.version:
+                heapq.heappop(heap)  # stale entry
+                continue
+            if load >= doc.capacity:
+                return None  # least-loaded is full, so everyone is
+            heapq.heappop(heap)
+            return doc
+        return None
+
+    def _give(self, doc, case):
+        case.doctor_id = doc.id
+        case.assigned_at = self.clock()
+        doc.cases[case.id] = case
+        doc.last_seq = next(self._seq)
+        self._push(doc)
+
+    def _route(self, case, specialty):
+        if not self._online.get(specialty):
+            specialty = FALLBACK_SPECIALTY
+        case.specialty = specialty
+        doc = self._pop_least_loaded(specialty)
+        if doc is not None:
+            self._give(doc, case)
+        else:
+            self._waiting.setdefault(specialty, {})[case.id] = case
+
+    def _touch(self, doc):
+        doc.last_seen = self.clock()
+        self._seen.pop(doc.id, None)
+        self._seen[doc.id] = doc.last_seen
+
+    def _drop_idle(self):
+        """Take doctors not seen for idle_timeout offline. _seen is oldest first."""
+        cutoff = self.clock() - self.idle_timeout
+        while self._seen:
+            doctor_id, last_seen = next(iter(self._seen.items()))
+            if last_seen > cutoff:
+                break
+            self._offline(self._doctors[doctor_id])
+
+    def _offline(self, doc):
+        """
+        Take an online doctor out of rotation. Their open cases are routed
+        again (to another doctor or the queue); returns those that found a doctor.
+        """
+        doc.online = False
+        doc.version += 1
+        self._seen.pop(doc.id, None)
+        self._online[doc.specialty] -= 1
+        orphans = sorted(doc.cases.values(), key=lambda c: c.created)
+        doc.cases.clear()
+        if not self._online[doc.specialty] and doc.specialty != FALLBACK_SPECIALTY:
+            # Last one out: whoever was waiting for this specialty goes to General
+            orphans += list(self._waiting.pop(doc.specialty, {}).values())
+        reassigned = []
+        for case in orphans:
+            case.doctor_id = None
+            case.assigned_at = None
+            self._route(case, case.requested)
+            if case.doctor_id is not None:
+                reassigned.append(case)
+        return reassigned
+
+    def _forget(self, case):
+        self._cases.pop(case.id, None)
+        if case.patient and self._by_patient.get(case.patient) == case.id:
+            del self._by_patient[case.patient]
+
+    def _withdraw(self, case):
+        """Drop an open case wherever it is; its doctor's slot goes to the queue."""
+        self._forget(case)
+        if case.doctor_id is None:
+            self._waiting.get(case.specialty, {}).pop(case.id, None)
+            return
+        doc = self._doctors.get(case.doctor_id)
+        if doc is not None and doc.cases.pop(case.id, None) is not None and doc.online:
+            self._push(doc)
+            self._drain_waiting(doc)
+
+    def _expire(self):
+        """Withdraw cases older than case_ttl. _cases is in creation order, so stop at the first fresh one."""
+        cutoff = self.clock() - self.case_ttl
+        while self._cases:
+            case = next(iter(self._cases.values()))
+            if case.created > cutoff:
+                break
+            self._withdraw(case)
+
+    def _drain_waiting(self, doc):
+        """Hand queued cases of the doctor's specialty to them while they have room."""
+        queue = self._waiting.get(doc.specialty)
+        handed = []
+        while queue and len(doc.cases) < doc.capacity:
+            case_id = next(iter(queue))
+            case = queue.pop(case_id)
+            self._give(doc, case)
+            handed.append(case)
+        return handed
@@ -0,0 +1,243 @@
+# services/events.py
+"""
+Append-only audit/event log.
+
+record() only appends the event to an in-memory buffer; a background writer
+thread group-commits whatever has accumulated (every FLUSH_INTERVAL seconds,
+or sooner once BATCH_MAX events are pending) with a single write + fsync, so
+request threads never wait on the disk.
+
+Events are JSON lines in segment files
+
+    <EVENT_LOG_DIR>/events-<first event ms>-<pid>.jsonl
+
+rotated once a segment grows past SEGMENT_BYTES. Each process writes its
+own segments (no locking between prefork workers). Since a segment's name
+carries the time of its first event, query() can skip whole segments
+outside the requested time range and streams the rest line by line.
+
+    {"type":"sos.raised","ts":1760870000.123,"pid":4242,"lat":20.93,...}
+"""
+import atexit
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+
+DEFAULTS = {
+    "EVENT_LOG_ENABLED": True,
+    "EVENT_LOG_SEGMENT_BYTES": 8 * 1024 * 1024,
+    "EVENT_LOG_FLUSH_INTERVAL": 0.2,   # seconds
+    "EVENT_LOG_BATCH_MAX": 512,
+    "EVENT_LOG_MAX_PENDING": 100000,   # beyond this, events are dropped (and counted)
+    "EVENT_LOG_FSYNC": True,
+}
+
+SEGMENT_PREFIX = "events-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class EventLog:
+    def __init__(self, directory, config=None):
+        self.directory = directory
+        self.cfg = dict(DEFAULTS)
+        self.cfg.update(config or {})
+        self.dropped = 0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._io_lock = threading.Lock()   # flush() may race the writer thread
+        self._pending = []
+        self._writer = None
+        self._closed = False
+        self._file = None
+        self._size = 0
+
+    # -------------------------------
+    # Producer side (request threads)
+    # -------------------------------
+    def record(self, event_type, **fields):
+        """Queue one event. Never blocks on I/O."""
+        if os.getpid() != self._pid:
+            self._reset()  # forked: the parent's writer thread did not come along
+        event = {"type": event_type, "ts": round(time.time(), 3), "pid": self._pid}
+        event.update(fields)
+        with self._lock:
+            if self._closed:
+                return
+            if len(self._pending) >= self.cfg["EVENT_LOG_MAX_PENDING"]:
+                self.dropped += 1
+                return
+            self._pending.append(event)
+            if len(self._pending) >= self.cfg["EVENT_LOG_BATCH_MAX"]:
+                self._wake.notify()
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+                self._writer.start()
+
+    def flush(self):
+        """Write everything pending now (on the calling thread)."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._commit(batch)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+        if self._writer is not None and self._pid == os.getpid():
+            self._writer.join(timeout=5)
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # -------------------------------
+    # Writer thread
+    # -------------------------------
+    def _run(self):
+        interval = self.cfg["EVENT_LOG_FLUSH_INTERVAL"]
+        while True:
+            with self._lock:
+                if not self._closed and len(self._pending) < self.cfg["EVENT_LOG_BATCH_MAX"]:
+                    self._wake.wait(interval)
+                batch, self._pending = self._pending, []
+                closed = self._closed
+            if batch:
+                try:
+                    self._commit(batch)
+                except OSError as e:
+                    print("❌ Event log write failed:", e)
+            if closed:
+                return
+
+    def _commit(self, batch):
+        """One group commit: a single write (and fsync) for the whole batch."""
+        data = "".join(json.dumps(e, separators=(",", ":"), default=str) + "\n"
+                       for e in batch).encode("utf-8")
+        with self._io_lock:
+            if self._file is None or self._size >= self.cfg["EVENT_LOG_SEGMENT_BYTES"]:
+                self._rotate(batch[0]["ts"])
+            self._file.write(data)
+            self._file.flush()
+            if self.cfg["EVENT_LOG_FSYNC"]:
+                os.fsync(self._file.fileno())
+            self._size += len(data)
+
+    def _rotate(self, first_ts):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{SEGMENT_PREFIX}{int(first_ts * 1000):013d}-{self._pid}{SEGMENT_SUFFIX}"
+        self._file = open(os.path.join(self.directory, name), "ab")
+        self._size = self._file.tell()
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+def _segments_by_pid(directory, since=None, until=None):
+    """{pid: [(start, path)]} of segments that may hold events in [since, until], oldest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return {}
+    by_pid = {}
+    for name in names:
+        if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+            continue
+        start, _, pid = name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)].partition("-")
+        by_pid.setdefault(pid, []).append((int(start) / 1000.0, name))
+
+    selected = {}
+    for pid, segs in by_pid.items():
+        segs.sort()
+        for i, (start, name) in enumerate(segs):
+            # A segment ends where the next one of the same process starts
+            end = segs[i + 1][0] if i + 1 < len(segs) else float("inf")
+            if (until is None or start <= until) and (since is None or end >= since):
+                selected.setdefault(pid, []).append((start, os.path.join(directory, name)))
+    return selected
+
+
+def segments(directory, since=None, until=None):
+    """Segment paths that may hold events in [since, until], oldest first."""
+    by_pid = _segments_by_pid(directory, since, until)
+    return [path for _, path in sorted(seg for segs in by_pid.values() for seg in segs)]
+
+
+def _type_matcher(types):
+    """
+    Exact types ("sos.raised") or prefixes ("sos.*"). Also returns the raw
+    substrings a line must contain, checked before paying for json.loads.
+    """
+    if not types:
+        return None, None
+    exact = {t for t in types if not t.endswith("*")}
+    prefixes = tuple(t[:-1] for t in types if t.endswith("*"))
+    needles = [f'"type":"{t}"' for t in exact] + [f'"type":"{p}' for p in prefixes]
+
+    def match(event_type):
+        return event_type in exact or event_type.startswith(prefixes)
+
+    return match, needles
+
+
+def _scan(path, since, until, match, needles):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if needles and not any(n in line for n in needles):
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # torn last line of a crashed writer
+            ts = event.get("ts", 0)
+            if (since is not None and ts < since) or (until is not None and ts > until):
+                continue
+            if match is not None and not match(event.get("type", "")):
+                continue
+            yield event
+
+
+def query(directory, since=None, until=None, types=None):
+    """
+    Stream events in [since, until] (unix seconds, either may be None) whose
+    type matches `types`, in time order across all segments.
+    """
+    match, needles = _type_matcher(types)
+    # One process's segments follow each other in time: read them one after
+    # another and merge only across processes, so at most one file per
+    # process is open at a time
+    streams = [itertools.chain.from_iterable(_scan(path, since, until, match, needles) for _, path in segs)
+               for segs in _segments_by_pid(directory, since, until).values()]
+    return heapq.merge(*streams, key=lambda e: e.get("ts", 0))
+
+
+# -------------------------------
+# App wiring
+# -------------------------------
+log = None
+
+
+def record(event_type, **fields):
+    """Record an event on the app's log; a no-op until init_app has run."""
+    if log is not None and log.cfg["EVENT_LOG_ENABLED"]:
+        log.record(event_type, **fields)
+
+
+def init_app(app):
+    global log
+    directory = app.config.setdefault(
+        "EVENT_LOG_DIR", os.getenv("EVENT_LOG_DIR", os.path.join(app.instance_path, "events")))
+    config = {key: app.config.get(key, default) for key, default in DEFAULTS.items()}
+    log = EventLog(directory, config)
+    app.extensions["event_log"] = log
+    atexit.register(log.close)
+    return log
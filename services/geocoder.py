@@ -0,0 +1,251 @@
+# services/geocoder.py
+"""
+Offline forward/reverse geocoding from a local gazetteer file.
+
+Forward lookups (type-ahead) use a sorted array of normalised name keys:
+every place contributes its name, its alternate names and each word-suffix
+of a multi-word name ("navi mumbai" -> also "mumbai"), so a prefix is a
+bisect range. Results are ranked by population. Ranking scans the whole
+range, so for every prefix matching more than RANK_THRESHOLD keys (the
+upper nodes of the implied trie) the top results are precomputed at load
+time; a lookup then never ranks more than RANK_THRESHOLD keys. A submitted
+place is resolved by exact name only (Gazetteer.resolve): a prefix is a
+suggestion, not a location.
+
+Reverse lookups use a uniform lat/lon grid (CELL_DEG degree cells) searched
+in growing square rings around the query point until no unsearched cell can
+hold anything closer.
+
+Gazetteer format (data/gazetteer.tsv, '#' lines are comments):
+
+    name <TAB> admin <TAB> latitude <TAB> longitude <TAB> population <TAB> alt1,alt2
+
+A GeoNames dump (cities15000.txt etc.) can be used as-is instead.
+"""
+import bisect
+import heapq
+import math
+import os
+import re
+import unicodedata
+from collections import namedtuple
+
+CELL_DEG = 0.25
+RANK_THRESHOLD = 256
+MAX_RESULTS = 10
+EARTH_DIAMETER_KM = 12742.0
+KM_PER_DEG = 111.32
+
+Place = namedtuple("Place", "name admin lat lon population")
+
+
+# Marks dropped from keys: Latin accents ("Belagavī") and the Devanagari
+# nukta, which people often leave out ("गाजियाबाद" for "ग़ाज़ियाबाद").
+# Vowel signs and viramas are part of Indic words and stay.
+DROPPED_MARKS = re.compile("[\u0300-\u036f\u093c]")
+
+
+def normalize(text):
+    """Case-fold, strip accents and collapse punctuation to single spaces.
+
+    Letters of any script are kept, so Devanagari names get keys too.
+    """
+    text = DROPPED_MARKS.sub("", unicodedata.normalize("NFKD", text or ""))
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = "".join(ch if ch.isalnum() or unicodedata.category(ch).startswith("M") else " "
+                   for ch in text)
+    return " ".join(text.split())
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    rlat1, rlat2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((rlat2 - rlat1) / 2) ** 2 + \
+        math.cos(rlat1) * math.cos(rlat2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return EARTH_DIAMETER_KM * math.asin(math.sqrt(a))
+
+
+def place_dict(place, distance_km=None):
+    d = {"name": place.name, "admin": place.admin,
+         "lat": place.lat, "lon": place.lon,
+         "label": f"{place.name}, {place.admin}" if place.admin else place.name}
+    if distance_km is not None:
+        d["distance_km"] = round(distance_km, 2)
+    return d
+
+
+def read_gazetteer(path):
+    """Yield (Place, [alternate names]) from our TSV format or a GeoNames dump."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            try:
+                if len(cols) >= 15:  # GeoNames
+                    place = Place(cols[1], cols[10], float(cols[4]), float(cols[5]),
+                                  int(cols[14] or 0))
+                    alts = [cols[2]] + cols[3].split(",")
+                else:
+                    place = Place(cols[0], cols[1], float(cols[2]), float(cols[3]),
+                                  int(cols[4] or 0) if len(cols) > 4 else 0)
+                    alts = cols[5].split(",") if len(cols) > 5 else []
+            except (IndexError, ValueError):
+                continue
+            yield place, [a for a in alts if a.strip()]
+
+
+class Gazetteer:
+    def __init__(self, entries=()):
+        self.places = []
+        keyed = []
+        self.grid = {}
+        self.names = {}  # normalised full name or alternate name -> place ids
+        for place, alts in entries:
+            idx = len(self.places)
+            self.places.append(place)
+            keys = set()
+            for name in [place.name] + alts:
+                words = normalize(name).split()
+                if words:
+                    self.names.setdefault(" ".join(words), []).append(idx)
+                for i in range(len(words)):
+                    keys.add(" ".join(words[i:]))
+            keyed.extend((key, idx) for key in keys)
+            self.grid.setdefault(self._cell(place.lat, place.lon), []).append(idx)
+
+        keyed.sort()
+        self.keys = [k for k, _ in keyed]
+        self.key_place = [i for _, i in keyed]
+
+        self._top = {}
+        self._precompute_top()
+
+    @classmethod
+    def load(cls, path):
+        return cls(read_gazetteer(path))
+
+    def __len__(self):
+        return len(self.places)
+
+    # -------------------------------
+    # Forward (type-ahead)
+    # -------------------------------
+    def _prefix_range(self, prefix):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "\uffff", lo)
+        return range(lo, hi)
+
+    def _precompute_top(self):
+        """Rank every prefix whose key range is too big to rank per request."""
+        keys = self.keys
+        level = [("", 0, len(keys))]
+        while level:
+            next_level = []
+            for prefix, lo, hi in level:
+                n = len(prefix) + 1
+                start = lo
+                while start < hi:
+                    if len(keys[start]) < n:
+                        start += 1  # the parent prefix itself
+                        continue
+                    child = keys[start][:n]
+                    end = bisect.bisect_left(keys, child + "\uffff", start, hi)
+                    if end - start > RANK_THRESHOLD:
+                        self._top[child] = self._rank(range(start, end), MAX_RESULTS)
+                        next_level.append((child, start, end))
+                    start = end
+            level = next_level
+
+    def _rank(self, key_range, limit):
+        """Distinct places behind a key range, most populous first."""
+        seen = set()
+        ids = [i for i in (self.key_place[k] for k in key_range)
+               if not (i in seen or seen.add(i))]
+        return heapq.nsmallest(limit, ids, key=lambda i: (-self.places[i].population, i))
+
+    def search(self, query, limit=5):
+        """
+        Places whose name (or alternate name, or a later word of it) starts
+        with `query`. "amra, maha" narrows by the admin region too.
+        """
+        name, _, admin = (query or "").partition(",")
+        prefix, admin = normalize(name), normalize(admin)
+        if not prefix:
+            return []
+        limit = max(1, min(limit, MAX_RESULTS))
+        ids = self._top.get(prefix)
+        if ids is None:
+            ids = self._rank(self._prefix_range(prefix), MAX_RESULTS)
+        if admin:
+            ids = [i for i in ids if normalize(self.places[i].admin).startswith(admin)]
+        ids = ids[:limit]
+        return [self.places[i] for i in ids]
+
+    def resolve(self, query):
+        """
+        The place a submitted name means: its name or an alternate name in
+        full, optionally followed by ", admin" naming its region exactly (the
+        type-ahead label). The most populous of several; None unless exact.
+        """
+        name, _, admin = (query or "").partition(",")
+        admin = normalize(admin)
+        ids = [i for i in self.names.get(normalize(name), ())
+               if not admin or normalize(self.places[i].admin) == admin]
+        if not ids:
+            return None
+        return self.places[min(ids, key=lambda i: (-self.places[i].population, i))]
+
+    # -------------------------------
+    # Reverse
+    # -------------------------------
+    @staticmethod
+    def _cell(lat, lon):
+        return int(math.floor(lat / CELL_DEG)), int(math.floor(lon / CELL_DEG))
+
+    @staticmethod
+    def _ring_cells(ci, cj, ring):
+        """Cells on the border of the (2 * ring + 1)^2 square around (ci, cj)."""
+        if ring == 0:
+            yield ci, cj
+            return
+        for j in range(cj - ring, cj + ring + 1):
+            yield ci - ring, j
+            yield ci + ring, j
+        for i in range(ci - ring + 1, ci + ring):
+            yield i, cj - ring
+            yield i, cj + ring
+
+    def nearest(self, lat, lon, max_km=100.0):
+        """(Place, distance_km) of the closest place within max_km, or None."""
+        if not self.places:
+            return None
+        ci, cj = self._cell(lat, lon)
+        best, best_d = None, max_km
+        ring = 0
+        while True:
+            # Anything in this ring or beyond is at least this far away
+            edge_lat = min(89.9, abs(lat) + (ring + 1) * CELL_DEG)
+            min_km = max(0, ring - 1) * CELL_DEG * KM_PER_DEG * math.cos(math.radians(edge_lat))
+            if min_km > best_d or ring * CELL_DEG > 180:
+                break
+            for cell in self._ring_cells(ci, cj, ring):
+                for idx in self.grid.get(cell, ()):
+                    p = self.places[idx]
+                    d = haversine_km(lat, lon, p.lat, p.lon)
+                    if d <= best_d:
+                        best, best_d = p, d
+            ring += 1
+        return (best, best_d) if best is not None else None
+
+
+def init_app(app):
+    """Load the gazetteer once per process (before fork under gunicorn's preload_app)."""
+    path = app.config.setdefault(
+        "GAZETTEER_PATH", os.getenv("GAZETTEER_PATH", os.path.join(app.root_path, "data", "gazetteer.tsv")))
+    if os.path.exists(path):
+        gazetteer = Gazetteer.load(path)
+    else:
+        print("⚠️ Gazetteer not found:", path)
+        gazetteer = Gazetteer()
+    app.extensions["geocoder"] = gazetteer
+    return gazetteer
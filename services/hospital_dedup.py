@@ -0,0 +1,186 @@
+# services/hospital_dedup.py
+"""
+Find the same facility entered several times (merged registries, bulk
+onboarding): names that differ slightly, coordinates that differ by GPS
+noise.
+
+Comparing every pair of names is O(N^2). Instead records are blocked into a
+lat/lon grid whose cells are at least radius_m wide, so two records within
+radius_m of each other are always in the same or adjacent cells. Each cell's
+names are scored against its own and its forward neighbours' names (each
+cell pair once) with one vectorised rapidfuzz cdist call, large blocks using
+all cores. Pairs scoring >= threshold and within radius_m become edges;
+connected components are the merge suggestions.
+"""
+import math
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+from rapidfuzz import fuzz
+from rapidfuzz.process import cdist
+
+DEFAULT_RADIUS_M = 250.0
+DEFAULT_THRESHOLD = 85
+PARALLEL_MIN_CELLS = 4096   # name pairs in a block before cdist uses every core
+METERS_PER_DEG = 111320.0
+
+# Forward half of the 8 neighbours: every adjacent cell pair is compared once
+FORWARD_NEIGHBOURS = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+NAME_ALIASES = {
+    "hosp": "hospital",
+    "hsp": "hospital",
+    "med": "medical",
+    "ctr": "centre",
+    "center": "centre",
+    "&": "and",
+    "st": "saint",
+    "dr": "doctor",
+}
+NAME_STOPWORDS = {"the", "pvt", "private", "ltd", "limited", "llp", "inc"}
+
+Record = namedtuple("Record", "id name lat lon")
+Suggestion = namedtuple("Suggestion", "keep duplicates pairs")
+
+
+def _words(text):
+    """
+    Case-folded Unicode words (and "&"). Combining marks such as Devanagari
+    vowel signs and virama stay inside their word, where \\w would split on them.
+    """
+    words, word = [], []
+    for ch in unicodedata.normalize("NFC", text).casefold() + " ":
+        if ch.isalnum() or unicodedata.category(ch).startswith("M"):
+            word.append(ch)
+            continue
+        if word:
+            words.append("".join(word))
+            word = []
+        if ch == "&":
+            words.append(ch)
+    return words
+
+
+def normalize_name(name):
+    """Case-fold, expand common abbreviations, drop legal-form noise words. "" if nothing is left."""
+    words = [NAME_ALIASES.get(w, w) for w in _words(name or "")]
+    return " ".join(w for w in words if w not in NAME_STOPWORDS)
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    rlat1, rlat2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((rlat2 - rlat1) / 2) ** 2 + \
+        math.cos(rlat1) * math.cos(rlat2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371000.0 * math.asin(math.sqrt(a))
+
+
+def build_blocks(records, radius_m=DEFAULT_RADIUS_M):
+    """{(row, col): [record index]} for a grid with cells >= radius_m on each side."""
+    if not records:
+        return {}
+    lat_step = radius_m / METERS_PER_DEG
+    # Longitude degrees shrink towards the poles: size cells for the worst latitude
+    max_lat = min(85.0, max(abs(r.lat) for r in records))
+    lon_step = lat_step / math.cos(math.radians(max_lat))
+    blocks = {}
+    for i, r in enumerate(records):
+        blocks.setdefault((int(math.floor(r.lat / lat_step)), int(math.floor(r.lon / lon_step))), []).append(i)
+    return blocks
+
+
+def candidate_pairs(records, radius_m=DEFAULT_RADIUS_M, threshold=DEFAULT_THRESHOLD, stats=None):
+    """
+    Yield (i, j, score, metres) for records i < j that are within radius_m
+    and whose normalised names score >= threshold (token_sort_ratio).
+    """
+    names = [normalize_name(r.name) for r in records]
+    blocks = build_blocks(records, radius_m)
+    # An empty key scores 100 against any other empty key: never compare those
+    blocks = {cell: kept for cell, members in blocks.items()
+              if (kept := [i for i in members if names[i]])}
+    compared = 0
+    for (row, col), members in blocks.items():
+        others = list(members)
+        for dr, dc in FORWARD_NEIGHBOURS:
+            others.extend(blocks.get((row + dr, col + dc), ()))
+        if len(others) < 2:
+            continue
+        compared += len(members) * len(others)
+        scores = cdist([names[i] for i in members], [names[j] for j in others],
+                       scorer=fuzz.token_sort_ratio, score_cutoff=threshold, dtype=np.uint8,
+                       workers=-1 if len(members) * len(others) >= PARALLEL_MIN_CELLS else 1)
+        for a, b in zip(*np.nonzero(scores)):
+            i, j = members[a], others[b]
+            if b < len(members) and i >= j:
+                continue  # same-cell pairs appear twice (and the diagonal)
+            metres = distance_m(records[i].lat, records[i].lon, records[j].lat, records[j].lon)
+            if metres <= radius_m:
+                yield min(i, j), max(i, j), int(scores[a, b]), metres
+    if stats is not None:
+        stats["blocks"] = len(blocks)
+        stats["compared"] = compared
+
+
+def suggest_merges(records, radius_m=DEFAULT_RADIUS_M, threshold=DEFAULT_THRESHOLD,
+                   prefer=None, stats=None):
+    """
+    Group likely duplicates. Returns [Suggestion(keep, duplicates, pairs)]
+    where keep/duplicates are records and pairs are (record, record, score,
+    metres). `prefer(record)` ranks which record to keep (highest wins,
+    default: lowest id, i.e. the first one entered).
+    """
+    parent = list(range(len(records)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    edges = []
+    for i, j, score, metres in candidate_pairs(records, radius_m, threshold, stats):
+        edges.append((i, j, score, metres))
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    groups = {}
+    for i, j, score, metres in edges:
+        groups.setdefault(find(i), []).append((records[i], records[j], score, round(metres, 1)))
+
+    prefer = prefer or (lambda r: (-r.id if isinstance(r.id, int) else 0))
+    suggestions = []
+    for pairs in groups.values():
+        members = {r.id: r for pair in pairs for r in pair[:2]}.values()
+        keep = max(members, key=prefer)
+        duplicates = sorted((r for r in members if r is not keep), key=lambda r: str(r.id))
+        suggestions.append(Suggestion(keep, duplicates, pairs))
+    suggestions.sort(key=lambda s: -len(s.duplicates))
+    return suggestions
+
+
+def find_similar(name, lat, lon, nearby, radius_m=DEFAULT_RADIUS_M, threshold=DEFAULT_THRESHOLD):
+    """[(record, score, metres)] among `nearby` records that look like this new one."""
+    key = normalize_name(name)
+    if not key:
+        return []
+    found = []
+    for r in nearby:
+        metres = distance_m(lat, lon, r.lat, r.lon)
+        if metres > radius_m:
+            continue
+        other = normalize_name(r.name)
+        if not other:
+            continue
+        score = fuzz.token_sort_ratio(key, other, score_cutoff=threshold)
+        if score:
+            found.append((r, int(score), round(metres, 1)))
+    return sorted(found, key=lambda f: -f[1])
+
+
+def bounding_box(lat, lon, radius_m=DEFAULT_RADIUS_M):
+    """(min_lat, max_lat, min_lon, max_lon) around a point, for an indexed SQL prefilter."""
+    dlat = radius_m / METERS_PER_DEG
+    dlon = dlat / max(0.01, math.cos(math.radians(min(85.0, abs(lat)))))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
@@ -0,0 +1,134 @@
+# services/i18n.py
+"""
+Precompiled message catalogs for the language selection flow.
+
+Source catalogs live in translations/<lang>.json (English text -> translated
+text). They are compiled into GNU gettext .mo files (see auto_translate.py)
+and loaded once per process by load_catalogs(). A request only picks the
+already-loaded catalog for its session language; nothing is translated at
+request time.
+
+Rendered pages and fragments are cached per language (see
+services/render_cache.py), so a Hindi or Marathi page costs the same as
+English.
+"""
+import array
+import gettext
+import json
+import os
+import struct
+
+from flask import session
+
+SUPPORTED_LANGUAGES = ("en", "hi", "mr")
+DEFAULT_LANGUAGE = "en"
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRANSLATIONS_DIR = os.path.join(BASE_DIR, "translations")
+
+MO_MAGIC = 0x950412de
+MO_HEADER = "Content-Type: text/plain; charset=UTF-8\n"
+
+# lang -> gettext translations object, filled once by load_catalogs()
+_catalogs = {}
+
+
+def compile_catalog(json_path, mo_path):
+    """
+    Compile one JSON catalog into a GNU gettext .mo file.
+    The .mo format stores sorted msgids with offset tables, so lookups at
+    runtime are a single dict access after GNUTranslations parses it.
+    """
+    with open(json_path, encoding="utf-8") as f:
+        messages = json.load(f)
+
+    messages = {k: v for k, v in messages.items() if k and v}
+    messages[""] = MO_HEADER
+    keys = sorted(messages)
+
+    ids = b""
+    strs = b""
+    offsets = []
+    for key in keys:
+        kb = key.encode("utf-8")
+        vb = messages[key].encode("utf-8")
+        offsets.append((len(ids), len(kb), len(strs), len(vb)))
+        ids += kb + b"\0"
+        strs += vb + b"\0"
+
+    keystart = 7 * 4 + 16 * len(keys)
+    valuestart = keystart + len(ids)
+    koffsets = []
+    voffsets = []
+    for o1, l1, o2, l2 in offsets:
+        koffsets += [l1, o1 + keystart]
+        voffsets += [l2, o2 + valuestart]
+
+    output = struct.pack("Iiiiiii", MO_MAGIC, 0, len(keys),
+                         7 * 4, 7 * 4 + len(keys) * 8, 0, 0)
+    output += array.array("i", koffsets + voffsets).tobytes()
+    output += ids + strs
+
+    with open(mo_path, "wb") as f:
+        f.write(output)
+    return len(keys) - 1
+
+
+def compile_catalogs(translations_dir=TRANSLATIONS_DIR, force=False):
+    """
+    Compile every translations/<lang>.json whose .mo is missing or stale.
+    Returns a dict of lang -> number of messages compiled.
+    """
+    compiled = {}
+    for lang in SUPPORTED_LANGUAGES:
+        json_path = os.path.join(translations_dir, f"{lang}.json")
+        mo_path = os.path.join(translations_dir, f"{lang}.mo")
+        if not os.path.exists(json_path):
+            continue
+        if not force and os.path.exists(mo_path) and \
+                os.path.getmtime(mo_path) >= os.path.getmtime(json_path):
+            continue
+        compiled[lang] = compile_catalog(json_path, mo_path)
+    return compiled
+
+
+def load_catalogs(translations_dir=TRANSLATIONS_DIR):
+    """
+    Load the compiled catalogs into memory. Called once at app startup;
+    stale or missing .mo files are rebuilt first so a fresh checkout works.
+    Languages without a catalog fall back to English.
+    """
+    compile_catalogs(translations_dir)
+    _catalogs.clear()
+    for lang in SUPPORTED_LANGUAGES:
+        mo_path = os.path.join(translations_dir, f"{lang}.mo")
+        if os.path.exists(mo_path):
+            with open(mo_path, "rb") as f:
+                _catalogs[lang] = gettext.GNUTranslations(f)
+        else:
+            _catalogs[lang] = gettext.NullTranslations()
+    return _catalogs
+
+
+def get_language():
+    """Return the session language, falling back to English if unsupported."""
+    lang = session.get("language", DEFAULT_LANGUAGE)
+    return lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+
+
+def get_catalog(lang):
+    catalog = _catalogs.get(lang)
+    if catalog is None:
+        catalog = _catalogs.setdefault(lang, gettext.NullTranslations())
+    return catalog
+
+
+def i18n_context():
+    """Template context: `_` bound to the current language's catalog."""
+    lang = get_language()
+    return {"_": get_catalog(lang).gettext, "current_language": lang}
+
+
+def init_app(app):
+    load_catalogs()
+    app.context_processor(i18n_context)
@@ -1,9 +1,17 @@
 # services/notifications.py
+import asyncio
 import os
 import smtplib
 from email.message import EmailMessage
 from dotenv import load_dotenv
 
+from services import events
+
+try:
+    import aiosmtplib
+except ImportError:  # optional, only used by the ASGI server
+    aiosmtplib = None
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -29,7 +37,37 @@ def send_email_notification(to_email, subject, body):
             smtp.send_message(msg)
             print(f"📨 Sent message to {to_email}")
 
+        events.record("email.sent", to=to_email, subject=subject)
+        return True
+    except Exception as e:
+        print("❌ Email failed:", e)
+        events.record("email.failed", to=to_email, subject=subject, error=str(e))
+        return False
+
+
+async def send_email_notification_async(to_email, subject, body):
+    """
+    Async variant for the ASGI server. Uses aiosmtplib when installed so the
+    SMTP round-trips don't hold a thread; otherwise the blocking sender runs
+    in the default thread pool.
+    Returns True if successful, False otherwise.
+    """
+    if aiosmtplib is None:
+        return await asyncio.to_thread(send_email_notification, to_email, subject, body)
+
+    try:
+        msg = EmailMessage()
+        msg['Subject'] = subject
+        msg['From'] = EMAIL_USER
+        msg['To'] = to_email
+        msg.set_content(body)
+
+        await aiosmtplib.send(msg, hostname='smtp.gmail.com', port=465, use_tls=True,
+                              username=EMAIL_USER, password=EMAIL_PASS)
+        print(f"📨 Sent message to {to_email}")
+        events.record("email.sent", to=to_email, subject=subject)
         return True
     except Exception as e:
         print("❌ Email failed:", e)
+        events.record("email.failed", to=to_email, subject=subject, error=str(e))
         return False
@@ -0,0 +1,165 @@
+# services/render_cache.py
+"""
+Page and fragment cache for hot, mostly-static pages.
+
+- @cached_page(data=(...)) caches the HTML a view returns from
+  render_template, keyed on the endpoint, its URL arguments, the session
+  language, whether someone is logged in (base.html shows a Logout link) and
+  the current version of every data set the page depends on. Responses carry
+  an ETag, so a browser revalidating an unchanged page gets a 304.
+- {% call cached_fragment(name, *vary) %} caches a rendered block per
+  (name, vary..., language).
+
+Both share one LRU store bounded by RENDER_CACHE_MAX_BYTES; page caching can
+be switched off with RENDER_CACHE_ENABLED = False. Routes that change
+data call bump_version(name) so every page built from the old data misses.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from markupsafe import Markup
+
+from services.i18n import get_language
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+class RenderCache:
+    """Thread-safe LRU of rendered HTML with a total size budget in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, etag, size)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, value):
+        """Store value (bytes or Markup) and return its (value, etag, size) entry."""
+        raw = value if isinstance(value, bytes) else str(value).encode("utf-8")
+        size = len(raw)
+        entry = (value, hashlib.sha1(raw).hexdigest(), size)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[2]
+            if size > self.max_bytes:
+                return entry  # too big to keep; still usable by the caller
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted[2]
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size,
+                    "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+cache = RenderCache()
+
+# data set name -> version, bumped whenever that data changes
+_versions = defaultdict(int)
+# data set name -> callable returning an extra version component, for data
+# that other processes can change (see set_version_source)
+_version_sources = {}
+
+
+def bump_version(name):
+    """Invalidate every cached page/fragment built from data set `name`."""
+    _versions[name] += 1
+
+
+def set_version_source(name, source):
+    """
+    Also key data set `name` on source(). With several worker processes a
+    bump_version() only reaches the local cache, so the shared hospital
+    data generation (services/shared_data.py) is registered here to
+    invalidate every worker.
+    """
+    _version_sources[name] = source
+
+
+def data_version(name):
+    source = _version_sources.get(name)
+    return (_versions[name], source()) if source else _versions[name]
+
+
+def _versions_key(data):
+    return tuple((name, data_version(name)) for name in data)
+
+
+def cached_page(data=()):
+    """
+    Cache the HTML returned by a GET view. `data` names the data sets the
+    page is built from (e.g. ("hospitals",)). Non-HTML return values such as
+    redirects or aborts pass through uncached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != "GET" or not current_app.config.get("RENDER_CACHE_ENABLED", True):
+                return view(*args, **kwargs)
+
+            key = ("page", request.endpoint, tuple(sorted(kwargs.items())),
+                   get_language(), "user_email" in session) + _versions_key(data)
+            entry = cache.get(key)
+            if entry is None:
+                rv = view(*args, **kwargs)
+                if not isinstance(rv, str):
+                    return rv
+                entry = cache.set(key, rv.encode("utf-8"))
+
+            body, etag, _ = entry
+            response = make_response(body)
+            response.set_etag(etag)
+            # Pages vary on the session cookie, so only the browser may reuse
+            # them, and it must revalidate (cheap 304) each time.
+            response.headers["Cache-Control"] = "private, no-cache"
+            response.vary.add("Cookie")
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def cached_fragment(name, *vary, caller, data=()):
+    """
+    Jinja call-block helper:
+
+        {% call cached_fragment('login_choice') %} ... {% endcall %}
+        {% call cached_fragment('hospital', hospital.id, data=('hospitals',)) %}
+
+    The block body is rendered once per (name, vary..., language, data versions)
+    and reused afterwards. Only wrap markup that depends on nothing else.
+    """
+    key = ("fragment", name, vary, get_language()) + _versions_key(data)
+    entry = cache.get(key)
+    if entry is None:
+        entry = cache.set(key, Markup(caller()))
+    return entry[0]
+
+
+def init_app(app):
+    cache.max_bytes = app.config.get("RENDER_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)
+    app.jinja_env.globals["cached_fragment"] = cached_fragment
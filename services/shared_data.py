@@ -0,0 +1,82 @@
+# services/shared_data.py
+"""
+Cross-process state for the multi-process deployment (gunicorn.conf.py).
+
+Read-mostly data -- SYMPTOM_INDEX, the gazetteer, translation catalogs --
+is built once when the preloading master imports the app and forked into
+the workers with it. What workers cannot inherit is news of later changes.
+
+control.bin is an 8-byte mmap'd counter holding the generation of the
+hospital data. publish() bumps it after an admin hospital edit; workers
+compare it to the generation they last saw on every access, which is a
+memory read, not a syscall. render_cache uses it as the "hospitals" data
+version, so every worker's page cache drops stale hospital pages, not just
+the one that handled the edit.
+"""
+import fcntl
+import mmap
+import os
+import struct
+
+CONTROL = struct.Struct("<q")
+
+
+def _control_path(shared_dir):
+    return os.path.join(shared_dir, "control.bin")
+
+
+def publish(shared_dir):
+    """Bump the shared hospital data generation. Returns the new generation."""
+    os.makedirs(shared_dir, exist_ok=True)
+    with open(os.path.join(shared_dir, "publish.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        ctl = _control_path(shared_dir)
+        if not os.path.exists(ctl):
+            with open(ctl, "wb") as f:
+                f.write(CONTROL.pack(0))
+        with open(ctl, "r+b") as f:
+            control = mmap.mmap(f.fileno(), CONTROL.size)
+        generation = CONTROL.unpack_from(control)[0] + 1
+        CONTROL.pack_into(control, 0, generation)
+        control.flush()
+        control.close()
+    return generation
+
+
+class SharedData:
+    """A worker's read-only view of the shared generation counter."""
+
+    def __init__(self, shared_dir):
+        self.shared_dir = shared_dir
+        self.generation = 0
+        self._control = None
+
+    def attached(self):
+        return self._control is not None
+
+    def refresh(self):
+        """Read the current generation. False until the first publish()."""
+        if self._control is None:
+            ctl = _control_path(self.shared_dir)
+            if not os.path.exists(ctl):
+                return False
+            with open(ctl, "rb") as f:
+                self._control = mmap.mmap(f.fileno(), CONTROL.size, access=mmap.ACCESS_READ)
+        self.generation = CONTROL.unpack_from(self._control)[0]
+        return True
+
+
+def memory_report(pid="self"):
+    """RSS and PSS in MB from /proc (Linux). PSS splits shared pages between their users."""
+    report = {}
+    for fname, key in (("status", "VmRSS"), ("smaps_rollup", "Pss")):
+        try:
+            with open(f"/proc/{pid}/{fname}") as f:
+                for line in f:
+                    if line.startswith(key + ":"):
+                        report[key.lower()] = int(line.split()[1]) / 1024.0
+                        break
+        except OSError:
+            pass
+    return report
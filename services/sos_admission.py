@@ -0,0 +1,287 @@
+# services/sos_admission.py
+"""
+Admission control for /api/send-sos.
+
+Every SOS used to run a DB query and a blocking SMTP send on the request
+thread, so a flood of taps (or a broken client) could starve real
+emergencies. SOSAdmission sits in front of that work:
+
+- repeated SOS from the same client and coordinates within SOS_DEDUP_WINDOW
+  share the ticket already in flight instead of sending another alert
+  (another patient at the same spot still gets their own dispatch);
+- token buckets per client and per location cell reject floods cheaply. A
+  rejected client is told help is coming only if an earlier SOS of theirs
+  is still in flight or was dispatched (rate_limited_reply); anyone else is
+  told plainly that the SOS was not sent;
+- admitted SOS go into a priority queue drained by dedicated worker threads.
+  A client's first SOS outranks repeats from clients already being served.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from services import events
+
+ADMITTED = "admitted"
+DUPLICATE = "duplicate"
+RATE_LIMITED = "rate_limited"
+QUEUE_FULL = "queue_full"
+
+PRIORITY_NEW = 0
+PRIORITY_REPEAT = 1
+
+EMERGENCY_NUMBER = "112"
+
+DEFAULTS = {
+    "SOS_WORKERS": 2,
+    "SOS_QUEUE_MAX": 1000,
+    "SOS_WAIT_TIMEOUT": 15.0,        # seconds the request waits for dispatch
+    "SOS_DEDUP_WINDOW": 120.0,       # seconds
+    "SOS_DEDUP_PRECISION": 3,        # decimal places, ~110 m
+    "SOS_CLIENT_RATE": 1 / 30.0,     # tokens per second per client
+    "SOS_CLIENT_BURST": 3,
+    "SOS_CELL_SIZE": 0.01,           # degrees, ~1 km
+    "SOS_CELL_RATE": 0.5,            # tokens per second per cell
+    "SOS_CELL_BURST": 10,
+}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def idle_full(self, now):
+        """True once the bucket would have refilled completely."""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class SOSTicket:
+    """One admitted SOS; duplicates wait on the same ticket."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, lat, lon, priority):
+        self.id = next(self._ids)
+        self.lat = lat
+        self.lon = lon
+        self.priority = priority
+        self.created = time.monotonic()
+        self.result = None
+        self._done = threading.Event()
+        self._callbacks = []
+        self._cb_lock = threading.Lock()
+
+    def resolve(self, result):
+        self.result = result
+        with self._cb_lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            cb()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout):
+        """Return the dispatch result, or None if still queued after timeout."""
+        self._done.wait(timeout)
+        return self.result
+
+    async def wait_async(self, timeout):
+        """Like wait(), without tying up a thread (used by the ASGI server)."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(None))
+
+        with self._cb_lock:
+            if self._done.is_set():
+                return self.result
+            self._callbacks.append(wake)
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.result
+
+
+def record_resolved(ticket):
+    """Audit event with the time from admission to dispatch result."""
+    events.record("sos.resolved", ticket=ticket.id, ok=bool(ticket.result.get("ok")),
+                  elapsed_ms=round((time.monotonic() - ticket.created) * 1000, 1))
+
+
+class SOSAdmission:
+    def __init__(self, dispatch, config=None):
+        """
+        dispatch(lat, lon, ticket_id) does the real work (pick a driver,
+        notify them) and returns the JSON-able result dict; it runs on a
+        worker thread.
+        """
+        cfg = dict(DEFAULTS)
+        cfg.update(config or {})
+        self.cfg = cfg
+        self.dispatch = dispatch
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._heap = []
+        self._seq = itertools.count()
+        self._client_buckets = {}
+        self._cell_buckets = {}
+        self._recent = {}          # (client, rounded coords) -> ticket
+        self._served = {}          # client id -> last admitted ticket
+        self._workers = []
+        self._submits = 0
+
+    # -------------------------------
+    # Admission
+    # -------------------------------
+    def submit(self, client_id, lat, lon):
+        """Return (status, ticket). ticket is None when the SOS is rejected."""
+        with self._lock:
+            status, ticket = self._admit(client_id, lat, lon, len(self._heap))
+            if status == ADMITTED:
+                heapq.heappush(self._heap, (ticket.priority, next(self._seq), ticket))
+                self._not_empty.notify()
+
+        if status == ADMITTED:
+            self._ensure_workers()
+        return status, ticket
+
+    def admit(self, client_id, lat, lon, queue_depth=0):
+        """
+        Run dedup and rate limiting only, for callers that queue admitted
+        tickets themselves (the async server). Same return as submit().
+        """
+        with self._lock:
+            return self._admit(client_id, lat, lon, queue_depth)
+
+    def _admit(self, client_id, lat, lon, queue_depth):
+        now = time.monotonic()
+        p = self.cfg["SOS_DEDUP_PRECISION"]
+        spot = (client_id, round(lat, p), round(lon, p))
+        cell_size = self.cfg["SOS_CELL_SIZE"]
+        cell = (int(lat // cell_size), int(lon // cell_size))
+
+        self._submits += 1
+        if self._submits % 256 == 0:
+            self._prune(now)
+
+        ticket = self._recent.get(spot)
+        if ticket is not None and now - ticket.created < self.cfg["SOS_DEDUP_WINDOW"]:
+            # A failed dispatch (e.g. no driver yet) must not block a retry
+            if not (ticket.done and not ticket.result.get("ok")):
+                return DUPLICATE, ticket
+
+        if not self._bucket(self._client_buckets, client_id, now,
+                            self.cfg["SOS_CLIENT_RATE"], self.cfg["SOS_CLIENT_BURST"]):
+            return RATE_LIMITED, None
+        if not self._bucket(self._cell_buckets, cell, now,
+                            self.cfg["SOS_CELL_RATE"], self.cfg["SOS_CELL_BURST"]):
+            return RATE_LIMITED, None
+        if queue_depth >= self.cfg["SOS_QUEUE_MAX"]:
+            return QUEUE_FULL, None
+
+        last = self._served.get(client_id)
+        repeat = last is not None and now - last.created < self.cfg["SOS_DEDUP_WINDOW"]
+        ticket = SOSTicket(lat, lon, PRIORITY_REPEAT if repeat else PRIORITY_NEW)
+        self._served[client_id] = ticket
+        self._recent[spot] = ticket
+        return ADMITTED, ticket
+
+    def pending_ticket(self, client_id):
+        """The client's last SOS within SOS_DEDUP_WINDOW if it is in flight or dispatched, else None."""
+        with self._lock:
+            ticket = self._served.get(client_id)
+        if ticket is None or time.monotonic() - ticket.created >= self.cfg["SOS_DEDUP_WINDOW"]:
+            return None
+        if ticket.done and not ticket.result.get("ok"):
+            return None
+        return ticket
+
+    def _bucket(self, buckets, key, now, rate, burst):
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst, now)
+        return bucket.take(now)
+
+    def _prune(self, now):
+        """Drop expired dedup entries and buckets that are full again."""
+        window = self.cfg["SOS_DEDUP_WINDOW"]
+        self._recent = {k: t for k, t in self._recent.items() if now - t.created < window}
+        self._served = {k: t for k, t in self._served.items() if now - t.created < window}
+        for buckets in (self._client_buckets, self._cell_buckets):
+            for key in [k for k, b in buckets.items() if b.idle_full(now)]:
+                del buckets[key]
+
+    # -------------------------------
+    # Workers
+    # -------------------------------
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.cfg["SOS_WORKERS"]):
+                t = threading.Thread(target=self._work, name=f"sos-worker-{i}", daemon=True)
+                t.start()
+                self._workers.append(t)
+
+    def _work(self):
+        while True:
+            with self._not_empty:
+                while not self._heap:
+                    self._not_empty.wait()
+                _, _, ticket = heapq.heappop(self._heap)
+            try:
+                result = self.dispatch(ticket.lat, ticket.lon, ticket.id)
+            except Exception as e:
+                print("❌ SOS dispatch failed:", e)
+                result = {"ok": False, "msg": "Dispatch failed"}
+            ticket.resolve(result)
+            record_resolved(ticket)
+
+    def queue_depth(self):
+        with self._lock:
+            return len(self._heap)
+
+
+def rate_limited_reply(pending):
+    """
+    JSON for a RATE_LIMITED SOS. `pending` is SOSAdmission.pending_ticket()
+    of the client: only then is help actually being arranged.
+    """
+    if pending is not None:
+        return {"ok": False, "ticket": pending.id,
+                "msg": "Too many SOS requests. Your earlier SOS was received, help is being arranged."}
+    return {"ok": False, "msg": "SOS NOT sent: too many requests from this area. "
+                                f"Retry in a few seconds or call {EMERGENCY_NUMBER}."}
+
+
+def init_app(app, dispatch):
+    """Create the SOSAdmission for `app`; dispatch runs inside an app context."""
+    def dispatch_in_context(lat, lon, ticket_id):
+        with app.app_context():
+            return dispatch(lat, lon, ticket_id)
+
+    config = {key: app.config.get(key, default) for key, default in DEFAULTS.items()}
+    admission = SOSAdmission(dispatch_in_context, config)
+    app.extensions["sos_admission"] = admission
+    return admission
@@ -149,6 +149,18 @@ SYMPTOM_KEYWORDS = {
     "injury": "General",
 }
 
+def sort_tokens(text: str):
+    """The preprocessing token_sort_ratio does: whitespace tokens, sorted."""
+    return " ".join(sorted(text.split()))
+
+
+# [(sorted keyword, specialty)] -- token_sort_ratio's work on the choices done
+# once instead of on every call. Built at import, before gunicorn forks.
+SYMPTOM_INDEX = [(sort_tokens(k), spec) for k, spec in SYMPTOM_KEYWORDS.items()]
+# The choices passed to extractOne, same order as SYMPTOM_INDEX
+SYMPTOM_CHOICES = [kw for kw, _ in SYMPTOM_INDEX]
+
+
 def match_specialty(description: str):
     """
     Map patient description to closest matching specialty.
@@ -156,15 +168,16 @@ def match_specialty(description: str):
     """
     description = description.lower().strip()
 
-    best_match, score, _ = process.extractOne(
-        description,
-        SYMPTOM_KEYWORDS.keys(),
-        scorer=fuzz.token_sort_ratio
+    # fuzz.ratio on pre-sorted tokens == fuzz.token_sort_ratio
+    best_match, score, pos = process.extractOne(
+        sort_tokens(description),
+        SYMPTOM_CHOICES,
+        scorer=fuzz.ratio
     )
 
     print(f"[DEBUG] Input: '{description}' | Best Match: '{best_match}' | Score: {score}")
 
     if score >= 40:
-        return SYMPTOM_KEYWORDS[best_match]
+        return SYMPTOM_INDEX[pos][1]
     else:
         return "General"
@@ -0,0 +1,138 @@
+# tests/conftest.py
+"""
+Shared fixtures for the query-budget tests.
+
+The app is imported against a throwaway SQLite database seeded once per
+session with PERF_HOSPITALS hospitals (default 50000) and a few thousand
+drivers, doctors and patients, so a plan that scans a table is as slow
+here as it would be in production.
+
+    python -m pytest -q
+    PERF_HOSPITALS=200000 python -m pytest -q tests/test_query_budget.py
+"""
+import os
+import random
+import re
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmpdir, "perf.db")
+os.environ["EVENT_LOG_DIR"] = os.path.join(_tmpdir, "events")
+
+from sqlalchemy import event  # noqa: E402
+
+import app as app_module  # noqa: E402
+from app import app, db  # noqa: E402
+from models.doctor_model import Doctor  # noqa: E402
+from models.driver_model import Driver  # noqa: E402
+from models.hospital_model import Hospital  # noqa: E402
+from models.user_model import User  # noqa: E402
+from services.geocoder import read_gazetteer  # noqa: E402
+
+HOSPITALS = int(os.getenv("PERF_HOSPITALS", 50000))
+PEOPLE = int(os.getenv("PERF_PEOPLE", 5000))
+SPECIALTIES = ["Cardiology", "ENT", "Neurology", "Orthopedics", "Pediatrics", "General",
+               "Dermatology", "Oncology", "Gynecology", "Urology"]
+
+# Any SCAN of one of these is a bug, with or without an index (a full index
+# scan still reads every row): they grow with the number of facilities / users
+LARGE_TABLES = {"hospitals", "drivers", "doctors", "users"}
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def seed(rng):
+    """Hospitals clustered around real cities (dense urban blocks, sparse rural ones)."""
+    cities = [(p.lat, p.lon, p.population) for p, _ in
+              read_gazetteer(os.path.join(app.root_path, "data", "gazetteer.tsv"))]
+    weights = [c[2] for c in cities]
+    hospitals = []
+    for i in range(HOSPITALS):
+        lat, lon, _ = rng.choices(cities, weights)[0]
+        hospitals.append({"name": f"Hospital {i:06d}", "specialization": rng.choice(SPECIALTIES),
+                          "machines": "ECG,MRI" if i % 3 else "X-Ray",
+                          "latitude": lat + rng.gauss(0, 0.1), "longitude": lon + rng.gauss(0, 0.1)})
+    db.session.execute(Hospital.__table__.insert(), hospitals)
+    db.session.execute(Driver.__table__.insert(), [
+        {"name": f"Driver {i}", "email": f"driver{i}@perf.test", "password": "x",
+         "phone": "9000000000", "is_available": rng.random() < 0.3} for i in range(PEOPLE)])
+    db.session.execute(Doctor.__table__.insert(), [
+        {"name": f"Doctor {i}", "email": f"doctor{i}@perf.test", "password": "x",
+         "specialization": rng.choice(SPECIALTIES)} for i in range(PEOPLE)])
+    db.session.execute(User.__table__.insert(), [
+        {"name": f"Patient {i}", "email": f"patient{i}@perf.test", "password": "x", "role": "patient"}
+        for i in range(PEOPLE)])
+    db.session.commit()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def perf_db():
+    with app.app_context():
+        seed(random.Random(7))
+        app_module.admin_stats.rebuild()
+        yield db
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+class QueryRecorder:
+    """Collects every statement the engine runs (any thread) while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_execute)
+
+    def plans(self):
+        """[(statement, [plan detail])] from EXPLAIN QUERY PLAN for each SELECT recorded."""
+        found = []
+        with self.engine.connect() as conn:
+            for statement, parameters in self.statements:
+                if not statement.lstrip().upper().startswith("SELECT"):
+                    continue
+                rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters or ()).all()
+                found.append((statement, [row[-1] for row in rows]))
+        return found
+
+    def full_scans(self):
+        """[(table, statement)] for plan steps that read a whole large table or one of its indexes."""
+        scans = []
+        for statement, details in self.plans():
+            for detail in details:
+                m = SCAN_RE.match(detail)
+                if m and m.group(1) in LARGE_TABLES:
+                    scans.append((m.group(1), statement))
+        return scans
+
+
+@pytest.fixture
+def query_budget():
+    """
+    with query_budget(n): ...  fails if the block issues more than n
+    statements or any statement's plan scans a large table.
+    """
+    @contextmanager
+    def budget(limit):
+        recorder = QueryRecorder(db.engine)
+        with recorder:
+            yield recorder
+        issued = "\n".join(f"  {s}" for s, _ in recorder.statements)
+        assert len(recorder.statements) <= limit, \
+            f"{len(recorder.statements)} queries, budget {limit}:\n{issued}"
+        scans = recorder.full_scans()
+        assert not scans, "full table scan:\n" + "\n".join(f"  {t}: {s}" for t, s in scans)
+    return budget
@@ -0,0 +1,196 @@
+# tests/test_query_budget.py
+"""
+Query budgets for the hot routes. Each request must stay within its
+declared number of SQL statements and never scan a large table; raise a
+budget only together with the change that needs it.
+"""
+import re
+import sqlite3
+from urllib.parse import unquote_plus
+
+import pytest
+
+import app as app_module
+from app import SEARCH_RADII_KM, db
+from models.hospital_model import Hospital
+
+PUNE = (18.5204, 73.8567)
+REMOTE = (23.5, 69.0)   # Kutch: few hospitals nearby, forces the widest boxes
+
+BUDGETS = {
+    # one box per widening step, then the fallback: newest hospital id + the rows.
+    # The DISTINCT lookups behind it are cached (warm_known_values)
+    "recommend": len(SEARCH_RADII_KM) + 2,
+    "hospital_list": len(SEARCH_RADII_KM) + 1,   # no specialization: no DISTINCT lookups
+    "hospital_list_page": 1,
+    "driver_dashboard": 1,
+    "driver_toggle": 3,                       # load, UPDATE, refresh after commit
+    "api_send_sos": 1,                        # the available-driver lookup on the SOS worker
+}
+
+
+@pytest.fixture
+def warm_known_values(client):
+    """Read the distinct specialization/machines values (an index scan) before the budget starts."""
+    client.get("/api/recommend", query_string={"specialization": "Cardiology"})
+
+
+def locate(client, lat, lon):
+    with client.session_transaction() as s:
+        s["patient_lat"] = lat
+        s["patient_lon"] = lon
+
+
+@pytest.mark.parametrize("specialization", ["Cardiology", "cardio", "ENT", ""])
+@pytest.mark.parametrize("where", [PUNE, REMOTE])
+def test_recommend_near_patient(client, query_budget, warm_known_values, specialization, where):
+    locate(client, *where)
+    with query_budget(BUDGETS["recommend"]):
+        resp = client.get("/recommend", query_string={"specialization": specialization})
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize("specialization", ["Cardiology", "ology", "MRI", "Nonexistent", ""])
+def test_recommend_without_location(client, query_budget, warm_known_values, specialization):
+    with query_budget(BUDGETS["recommend"]):
+        resp = client.get("/recommend", query_string={"specialization": specialization})
+    assert resp.status_code == 200
+
+
+def test_api_recommend(client, query_budget, warm_known_values):
+    with query_budget(BUDGETS["recommend"]):
+        resp = client.get("/api/recommend", query_string={"specialization": "Neurology",
+                                                          "lat": PUNE[0], "lon": PUNE[1]})
+    hospitals = resp.get_json()["hospitals"]
+    assert 0 < len(hospitals) <= app_module.RECOMMEND_LIMIT
+    assert all("Neurology" in h["specialization"] for h in hospitals)
+    assert [h["distance"] for h in hospitals] == sorted(h["distance"] for h in hospitals)
+
+
+def test_api_recommend_returns_nearest(client):
+    """The widening search returns exactly what ranking the whole table would."""
+    resp = client.get("/api/recommend", query_string={"specialization": "Urology",
+                                                      "lat": PUNE[0], "lon": PUNE[1]})
+    got = [h["distance"] for h in resp.get_json()["hospitals"]]
+    everything = app_module.rank_hospitals(
+        Hospital.query.filter(app_module.specialization_filter("Urology")).all(), *PUNE)
+    # Distances, not ids: hospitals at the same rounded distance may come in either order
+    assert got == [h["distance"] for h in everything[:app_module.RECOMMEND_LIMIT]]
+
+
+def test_recommend_sees_rows_inserted_outside_the_app(client):
+    """Bulk imports and scripts bypass the app (and its event log); they must still be found."""
+    with sqlite3.connect(db.engine.url.database) as conn:
+        conn.executemany(
+            "INSERT INTO hospitals (name, specialization, machines, latitude, longitude) VALUES (?, ?, ?, ?, ?)",
+            [(f"Imported {i}", "Nephrology", "Dialysis,ECG", PUNE[0] + i / 1000, PUNE[1]) for i in range(5)])
+    for specialization in ("Nephrology", "nephro", "Dialysis"):
+        for located in ({}, {"lat": PUNE[0], "lon": PUNE[1]}):
+            resp = client.get("/api/recommend", query_string={"specialization": specialization, **located})
+            names = {h["name"] for h in resp.get_json()["hospitals"]}
+            assert {f"Imported {i}" for i in range(5)} <= names, (specialization, located)
+
+
+def test_known_values_are_cached(client, query_budget, warm_known_values):
+    with query_budget(BUDGETS["recommend"]) as recorder:
+        client.get("/api/recommend", query_string={"specialization": "ology"})
+    assert not [s for s, _ in recorder.statements if "DISTINCT" in s]
+
+
+def test_recommend_ranks_matches_beyond_the_widest_box(client):
+    """Fewer matches than the limit within 500 km: still the nearest, not the first by name."""
+    kochi, chennai, delhi = (9.9312, 76.2673), (13.0827, 80.2707), (28.7041, 77.1025)
+    db.session.add(Hospital(name="Zz Chennai Oncology", specialization="Radiation Oncology",
+                            machines="", latitude=chennai[0], longitude=chennai[1]))
+    db.session.add_all([Hospital(name=f"Aa Delhi Oncology {i}", specialization="Radiation Oncology",
+                                 machines="", latitude=delhi[0] + i / 1000, longitude=delhi[1])
+                        for i in range(60)])
+    db.session.commit()
+    resp = client.get("/api/recommend", query_string={"specialization": "Radiation Oncology",
+                                                      "lat": kochi[0], "lon": kochi[1]})
+    hospitals = resp.get_json()["hospitals"]
+    assert hospitals[0]["name"] == "Zz Chennai Oncology"
+    assert hospitals[0]["distance"] > SEARCH_RADII_KM[-1]
+    assert len(hospitals) == app_module.RECOMMEND_LIMIT
+    assert [h["distance"] for h in hospitals] == sorted(h["distance"] for h in hospitals)
+
+
+@pytest.mark.parametrize("where", [PUNE, REMOTE])
+def test_hospital_list_near_patient(client, query_budget, where):
+    locate(client, *where)
+    with query_budget(BUDGETS["hospital_list"]):
+        resp = client.get("/hospitals")
+    assert resp.status_code == 200
+
+
+@pytest.mark.parametrize("cursor", [{}, {"after": "Hospital 000049", "after_id": 50},
+                                    {"after": "Hospital 040000", "after_id": 40001},
+                                    {"before": "Hospital 040000", "before_id": 40001}])
+def test_hospital_list_pages(client, query_budget, cursor):
+    with query_budget(BUDGETS["hospital_list_page"]):
+        resp = client.get("/hospitals", query_string=cursor)
+    assert resp.status_code == 200
+
+
+def page_link(html, direction):
+    """Query args of the page's Next (after) or Previous (before) link."""
+    name, hospital_id = re.search(rf'{direction}=([^&"]+)&amp;{direction}_id=(\d+)', html).groups()
+    return {direction: unquote_plus(name), f"{direction}_id": hospital_id}
+
+
+def test_hospital_list_next_then_previous(client):
+    def names(html):
+        return re.findall(r"<strong>(.*?)</strong>", html)
+
+    first = client.get("/hospitals").get_data(as_text=True)
+    second = client.get("/hospitals", query_string=page_link(first, "after")).get_data(as_text=True)
+    assert len(names(second)) == app_module.HOSPITAL_PAGE_SIZE
+    assert names(second)[0] > names(first)[-1]
+    back = client.get("/hospitals", query_string=page_link(second, "before")).get_data(as_text=True)
+    assert names(back) == names(first)
+
+
+def login_driver(client, n):
+    with client.session_transaction() as s:
+        s["user_role"] = "driver"
+        s["user_email"] = f"driver{n}@perf.test"
+
+
+def test_driver_dashboard(client, query_budget):
+    login_driver(client, 4321)
+    with query_budget(BUDGETS["driver_dashboard"]):
+        resp = client.get("/driver/dashboard")
+    assert resp.status_code == 200
+
+
+def test_driver_toggle(client, query_budget):
+    login_driver(client, 1234)
+    with query_budget(BUDGETS["driver_toggle"]):
+        resp = client.post("/driver/dashboard", data={"action": "toggle"})
+    assert resp.status_code == 200
+    client.post("/driver/dashboard", data={"action": "toggle"})
+
+
+@pytest.mark.parametrize("n", range(3))
+def test_api_send_sos(client, query_budget, monkeypatch, n):
+    monkeypatch.setattr(app_module, "send_email_notification", lambda *args: True)
+    with query_budget(BUDGETS["api_send_sos"]):
+        resp = client.post("/api/send-sos", json={"lat": 19.0 + n, "lon": 73.0 + n},
+                           environ_overrides={"REMOTE_ADDR": f"10.0.0.{n + 1}"})
+    assert resp.get_json()["ok"] is True
+
+
+# -------------------------------
+# The harness itself
+# -------------------------------
+def test_harness_catches_full_scan(query_budget):
+    with pytest.raises(AssertionError, match="full table scan"):
+        with query_budget(10):
+            Hospital.query.filter(Hospital.machines.ilike("%MRI%")).limit(5).all()
+
+
+def test_harness_catches_n_plus_one(query_budget):
+    with pytest.raises(AssertionError, match="budget 3"):
+        with query_budget(3):
+            for hospital_id in range(1, 11):
+                db.session.get(Hospital, hospital_id)